@@ -0,0 +1,163 @@
+import asyncio
+import time
+from collections import deque
+
+from latency import percentile
+from tracing import response_headers_hook, span
+
+
+class EndpointRtt:
+    """单个接口的响应时间统计：平滑RTT与偏差（RFC 6298）以及最近若干次样本"""
+
+    def __init__(self, window=32):
+        self.srtt = None
+        self.rttvar = None
+        self.samples = deque(maxlen=window)
+        # 超时后的退避倍数，收到新的RTT样本后恢复为1
+        self.backoff = 1
+
+    def observe(self, rtt, alpha=1 / 8, beta=1 / 4):
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = (1 - beta) * self.rttvar + beta * abs(self.srtt - rtt)
+            self.srtt = (1 - alpha) * self.srtt + alpha * rtt
+        self.samples.append(rtt)
+        self.backoff = 1
+
+
+class AdaptiveTimeouts:
+    """按接口自适应的请求超时与对冲请求
+
+    统计按接口区分（默认以URL为键，同一URL用不同方法请求时由调用方传入key），同一主机上的
+    小探测与大页面互不影响。样本为收到响应头的时间，不含读取正文。
+    超时按TCP RTO的方式计算：SRTT + 4 * RTTVAR，限制在[min_timeout, 调用方给出的固定超时]之间，
+    没有样本时使用固定超时；该超时只约束收到响应头之前，之后读取正文只受总预算限制。
+    超过该接口观测到的p95（样本数不少于min_samples）仍未收到响应头时，再发出一个相同的请求，
+    先完成者胜出，另一个被取消。
+    """
+
+    def __init__(self, min_timeout=1.0, min_samples=5, window=32):
+        self.min_timeout = min_timeout
+        self.min_samples = min_samples
+        self.window = window
+        self.endpoints = {}
+        # 发出的对冲请求数与其中胜出的次数
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def stats(self, key):
+        if key not in self.endpoints:
+            self.endpoints[key] = EndpointRtt(self.window)
+        return self.endpoints[key]
+
+    def observe(self, key, rtt):
+        self.stats(key).observe(rtt)
+
+    def timeout(self, key, default):
+        stats = self.endpoints.get(key)
+        if stats is None or stats.srtt is None:
+            return default
+        return min(max((stats.srtt + 4 * stats.rttvar) * stats.backoff, self.min_timeout), default)
+
+    def hedge_delay(self, key):
+        """发出对冲请求前等待的时间，样本不足时返回None（不对冲）"""
+        stats = self.endpoints.get(key)
+        if stats is None or len(stats.samples) < self.min_samples:
+            return None
+        return percentile(list(stats.samples), 95)
+
+    async def run(self, url, fetch, default, attempts=2, budget=None, key=None):
+        """以自适应超时执行fetch(timeout)，必要时发出对冲请求
+
+        fetch应完成整个请求并返回结果，抛出的异常视为本次尝试失败；传给fetch的timeout为本次尝试
+        剩余的总预算。某次尝试失败时立即发出下一次（不再等满超时）；全部失败时抛出最后一个异常。
+        所有尝试共用budget秒（默认等于固定超时），因此最坏情况下的总耗时不超过原来的固定超时。
+        """
+        key = key or url
+        hedge_delay = self.hedge_delay(key)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (budget or default)
+        hedge_at = None if hedge_delay is None else loop.time() + hedge_delay
+        tasks = {}
+        # 各次尝试收到响应头的时间，尚未收到时不在其中
+        headers = {}
+        # 各次尝试的追踪区间，失败后被重试的尝试记为retry
+        spans = []
+        last_error = None
+
+        async def attempt(index, hedged, timeout, limit):
+            task = asyncio.current_task()
+            expired = []
+
+            def expire():
+                expired.append(True)
+                task.cancel()
+
+            # 自适应超时只约束到收到响应头为止
+            watchdog = loop.call_later(timeout, expire)
+
+            def on_headers():
+                if task not in headers:
+                    headers[task] = time.perf_counter()
+                    watchdog.cancel()
+
+            response_headers_hook.set(on_headers)
+            with span(url, "attempt", attempt=index + 1, hedged=hedged, timeout=round(timeout, 3)) as item:
+                spans.append(item)
+                started = time.perf_counter()
+                try:
+                    result = await fetch(limit)
+                except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+                    if isinstance(e, asyncio.CancelledError) and not expired:
+                        raise
+                    # 与TCP相同，超时后加倍该接口的超时，避免网络变慢时反复过早放弃
+                    stats = self.stats(key)
+                    stats.backoff = min(stats.backoff * 2, 64)
+                    raise asyncio.TimeoutError() from None
+                finally:
+                    watchdog.cancel()
+                # 没有经过追踪的会话（收不到响应头回调）时以整个请求的耗时为样本
+                self.observe(key, headers.get(task, time.perf_counter()) - started)
+                return result
+
+        def launch(hedged):
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return False
+            index = len(tasks)
+            limit = min(default, remaining)
+            tasks[asyncio.create_task(attempt(index, hedged, min(self.timeout(key, default), limit), limit))] = hedged
+            if hedged:
+                self.hedges += 1
+            return True
+
+        launch(False)
+        try:
+            while True:
+                pending = [task for task in tasks if not task.done()]
+                # 还能再发一次时，等到p95再发出对冲请求
+                wait_for = max(hedge_at - loop.time(), 0) if hedge_at is not None and len(tasks) < attempts else None
+                done, _ = await asyncio.wait(pending, timeout=wait_for, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    if any(task in headers for task in pending) or not launch(True):
+                        # 已收到响应头的请求只差读取正文，不再对冲；或预算已用完
+                        hedge_at = None
+                    continue
+                for task in done:
+                    if task.exception() is None:
+                        if tasks[task]:
+                            self.hedge_wins += 1
+                        return task.result()
+                    last_error = task.exception()
+                if not any(not task.done() for task in tasks):
+                    # 上一次尝试失败，立即重试
+                    if len(tasks) >= attempts or not launch(False):
+                        raise last_error
+                    if spans[-1] is not None:
+                        spans[-1]["outcome"] = "retry"
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,274 @@
+"""离线基准测试：在本地替身服务上运行全部检测，测量耗时并与基线比较
+
+用法示例：
+    python src/benchmark.py
+    python src/benchmark.py --iterations 10 --update-baseline
+    python src/benchmark.py --scenario nominal --scenario lossy --json
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+from adaptive import AdaptiveTimeouts
+from history import result_rows
+from language import LanguageManager
+from latency import percentile
+from session import SessionManager
+from standin import Fault, StandInServer
+from storage import data_path
+from worker import AsyncWorker
+
+BASELINE_VERSION = 1
+
+# 场景：替身服务的故障注入配置与本轮检测的时间预算（秒）
+SCENARIOS = {
+    "nominal": {
+        "server": {"default": Fault(latency=0.02, jitter=0.01)},
+        "stable_status": True
+    },
+    "lossy": {
+        "server": {"default": Fault(latency=0.02, jitter=0.01, loss=0.1)},
+        "stable_status": False
+    },
+    "slow_streaming": {
+        "server": {
+            "default": Fault(latency=0.02),
+            "faults": {
+                "netflix_titles": Fault(latency=0.4),
+                "netflix_home": Fault(latency=0.4),
+                "youtube_premium": Fault(latency=0.3)
+            }
+        },
+        "stable_status": True
+    },
+    "hung_endpoints": {
+        "server": {
+            "default": Fault(latency=0.02),
+            "faults": {"google": Fault(hang=True), "cnki_login": Fault(hang=True)}
+        },
+        "deadline": 3.0,
+        "stable_status": True
+    },
+    # 少数请求异常缓慢：预热几轮积累RTT统计后，超过p95的请求会发出对冲请求
+    "tail_latency": {
+        "server": {"default": Fault(latency=0.02, jitter=0.01, slow=0.1, slow_latency=1.5)},
+        "warmup": 5,
+        "stable_status": True
+    },
+    "throughput": {
+        "server": {"default": Fault(latency=0.02), "throughput_bytes": 32 * 1024 * 1024},
+        "worker": {"throughput": True},
+        "stable_status": True
+    },
+    # 应用启动：每次在全新进程中导入主模块并构建首屏，不经过替身服务
+    "startup": {
+        "startup": True,
+        "stable_status": True
+    }
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="IPTest offline benchmark")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="只运行指定场景，可重复")
+    parser.add_argument("--iterations", type=int, default=5, help="每个场景的运行次数")
+    parser.add_argument("--warm", action="store_true", help="各次运行之间复用连接池")
+    parser.add_argument("--baseline", default=None, help="基线文件路径，默认保存在应用数据目录")
+    parser.add_argument("--update-baseline", action="store_true", help="以本次结果覆盖基线")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="允许的相对变慢比例")
+    parser.add_argument("--slack", type=float, default=20.0, help="允许的绝对变慢毫秒数，避免小数值抖动误报")
+    parser.add_argument("--json", action="store_true", help="以JSON格式输出报告")
+    return parser.parse_args(argv)
+
+
+async def run_iteration(lang_manager, server, session_manager, timeouts, scenario):
+    """运行一次全部检测，返回端到端耗时、首个结果耗时与各检测耗时（毫秒）"""
+    worker = AsyncWorker(lang_manager, session_manager=session_manager, endpoints=server.endpoints(),
+                         timeouts=timeouts, **scenario.get("worker", {}))
+    first = {}
+    started = time.perf_counter()
+
+    async def update_callback(key, value):
+        elapsed = (time.perf_counter() - started) * 1000
+        first.setdefault("result", elapsed)
+        if key == "ip_info":
+            first["ip_info"] = elapsed
+
+    deadline = started + scenario["deadline"] if scenario.get("deadline") else None
+    async with worker:
+        results = await worker.run_all_checks(update_callback=update_callback, deadline=deadline)
+    wall = (time.perf_counter() - started) * 1000
+
+    checks = {"ip_info": first.get("ip_info")}
+    schedule = worker.last_schedule
+    if schedule:
+        for key, (start, end) in schedule.timings.items():
+            if end is not None:
+                checks[key] = (end - start) * 1000
+    # 与历史记录相同的状态判定，超时的检测记为timeout
+    statuses = {key: status for _, key, status, _, _, _ in result_rows(worker, results, None)}
+    return {"wall_ms": wall, "first_result_ms": first.get("result"), "checks": checks, "statuses": statuses,
+            "scan_bytes_read": sum(report["bytes_read"] for report in worker.scan_reports.values())}
+
+
+async def run_startup(iterations):
+    """在子进程中运行startup.py，报告主模块导入耗时与首屏耗时"""
+    samples = []
+    for _ in range(iterations):
+        output = await asyncio.to_thread(
+            subprocess.run, [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "startup.py")],
+            capture_output=True, text=True, check=True
+        )
+        samples.append(json.loads(output.stdout.strip().splitlines()[-1]))
+
+    def summarize(values):
+        return {"p50": percentile(values, 50), "p95": percentile(values, 95)}
+
+    return {
+        "iterations": iterations,
+        "requests": 0,
+        "dropped": 0,
+        "wall_ms": summarize([sample["first_frame_ms"] for sample in samples]),
+        "first_result_ms": None,
+        "checks": {
+            "import": summarize([sample["import_ms"] for sample in samples]),
+            "first_frame": summarize([sample["first_frame_ms"] for sample in samples])
+        },
+        # 首屏之前已导入的检测模块（应为空），变化时记为回归
+        "statuses": {"eager_imports": ",".join(samples[-1]["loaded"]) or "none"}
+    }
+
+
+async def run_scenario(lang_manager, name, iterations, warm):
+    scenario = SCENARIOS[name]
+    if scenario.get("startup"):
+        return await run_startup(iterations)
+    samples = []
+    async with StandInServer(**scenario["server"]) as server:
+        session_manager = SessionManager() if warm else None
+        # 自适应超时的RTT统计在同一场景的各次运行之间保留（与应用多次刷新一致）
+        timeouts = session_manager.timeouts if session_manager else AdaptiveTimeouts()
+        try:
+            for index in range(scenario.get("warmup", 0) + iterations):
+                sample = await run_iteration(lang_manager, server, session_manager, timeouts, scenario)
+                if index >= scenario.get("warmup", 0):
+                    samples.append(sample)
+        finally:
+            if session_manager:
+                await session_manager.close()
+        requests, dropped = server.requests, server.dropped
+
+    def summarize(values):
+        values = [value for value in values if value is not None]
+        return {"p50": percentile(values, 50), "p95": percentile(values, 95)} if values else None
+
+    keys = sorted({key for sample in samples for key in sample["checks"]})
+    return {
+        "iterations": iterations,
+        "requests": requests,
+        "dropped": dropped,
+        "wall_ms": summarize([sample["wall_ms"] for sample in samples]),
+        "first_result_ms": summarize([sample["first_result_ms"] for sample in samples]),
+        # 流式扫描页面实际读取的字节数
+        "scan_bytes_read": summarize([sample["scan_bytes_read"] for sample in samples]),
+        "hedges": timeouts.hedges,
+        "hedge_wins": timeouts.hedge_wins,
+        "checks": {key: summarize([sample["checks"].get(key) for sample in samples]) for key in keys},
+        "statuses": samples[-1]["statuses"]
+    }
+
+
+def load_baseline(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get("version") == BASELINE_VERSION:
+            return baseline["scenarios"]
+    except (OSError, ValueError):
+        pass
+    return {}
+
+
+def save_baseline(path, report):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"version": BASELINE_VERSION, "scenarios": report}, f, ensure_ascii=False, indent=2)
+
+
+def compare(name, current, baseline, tolerance, slack):
+    """与基线比较p50耗时，超出容差的指标以及状态变化记为回归"""
+    regressions = []
+
+    def check(metric, now, before):
+        if now and before and now["p50"] is not None and before["p50"] is not None:
+            limit = before["p50"] * (1 + tolerance) + slack
+            if now["p50"] > limit:
+                regressions.append(f"{name}.{metric}: {now['p50']:.1f} ms > {limit:.1f} ms "
+                                   f"(baseline {before['p50']:.1f} ms)")
+
+    check("wall_ms", current["wall_ms"], baseline.get("wall_ms"))
+    check("first_result_ms", current["first_result_ms"], baseline.get("first_result_ms"))
+    for key, summary in current["checks"].items():
+        check(key, summary, baseline.get("checks", {}).get(key))
+    if SCENARIOS[name].get("stable_status"):
+        for key, status in baseline.get("statuses", {}).items():
+            if current["statuses"].get(key) != status:
+                regressions.append(f"{name}.{key}: status {current['statuses'].get(key)} != {status}")
+    return regressions
+
+
+def format_report(report, regressions):
+    lines = []
+
+    def fmt(summary):
+        if not summary:
+            return "-"
+        return f"p50 {summary['p50']:8.1f}  p95 {summary['p95']:8.1f}"
+
+    for name, result in report.items():
+        lines.append(f"== {name} ({result['iterations']} runs, {result['requests']} requests, "
+                     f"{result['dropped']} dropped, {result.get('hedges', 0)} hedged, "
+                     f"{result.get('hedge_wins', 0)} hedges won)")
+        lines.append(f"  {'wall_ms':<16}{fmt(result['wall_ms'])}")
+        lines.append(f"  {'first_result_ms':<16}{fmt(result['first_result_ms'])}")
+        lines.append(f"  {'scan_bytes_read':<16}{fmt(result.get('scan_bytes_read'))}")
+        for key, summary in result["checks"].items():
+            lines.append(f"  {key:<16}{fmt(summary)}")
+    if regressions:
+        lines.append("REGRESSIONS:")
+        lines.extend(f"  {item}" for item in regressions)
+    return "\n".join(lines)
+
+
+async def run(args):
+    lang_manager = LanguageManager('en_US')
+    path = args.baseline or data_path("benchmark_baseline.json")
+    baseline = load_baseline(path)
+    report = {}
+    regressions = []
+    for name in args.scenario or SCENARIOS:
+        report[name] = await run_scenario(lang_manager, name, args.iterations, args.warm)
+        if name in baseline:
+            regressions.extend(compare(name, report[name], baseline[name], args.tolerance, args.slack))
+
+    if args.json:
+        print(json.dumps({"scenarios": report, "regressions": regressions}, ensure_ascii=False, indent=2))
+    else:
+        print(format_report(report, regressions))
+    if args.update_baseline:
+        baseline.update(report)
+        save_baseline(path, baseline)
+        return 0
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    return asyncio.run(run(parse_args(argv)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
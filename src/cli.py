@@ -0,0 +1,206 @@
+"""无界面命令行模式：不启动Flet，直接运行全部检测并逐条输出结果
+
+用法示例：
+    python src/cli.py --json
+    python src/cli.py --json --repeat 10 --interval 60 --lang en_US
+    python src/cli.py --query github_speed --since 24
+    python src/cli.py --json --proxies proxies.txt --fanout 32
+    python src/cli.py --repeat 0 --interval 300 --metrics-file /var/lib/node_exporter/textfile/iptest.prom
+    python src/cli.py --dns --dns-server 1.1.1.1 --dns-server 223.5.5.5
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import sys
+import time
+
+from dnsbench import benchmark_dns, target_domains
+from fanout import ProxyFanout, load_proxies
+from geocache import GeoCache
+from history import HistoryStore
+from language import LanguageManager
+from metrics import CheckMetrics
+from runner import RunController
+from session import SessionManager
+from worker import ENDPOINTS, AsyncWorker
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="IPTest headless mode")
+    parser.add_argument("--json", action="store_true", help="以NDJSON格式输出，每条检测结果一行")
+    parser.add_argument("--repeat", type=int, default=1, help="运行次数，0表示持续运行")
+    parser.add_argument("--interval", type=float, default=60.0, help="两次运行之间的间隔（秒）")
+    parser.add_argument("--cold", action="store_true", help="每次运行都重新建立连接，测量首次连接延迟")
+    parser.add_argument("--throughput", action="store_true", help="同时运行下载测速")
+    parser.add_argument("--no-geo-cache", action="store_true", help="不使用本地IP地理位置缓存")
+    parser.add_argument("--deadline", type=float, default=60.0, help="每次运行的总时间预算（秒），0表示不限制")
+    parser.add_argument("--no-history", action="store_true", help="不将结果写入本地历史记录")
+    parser.add_argument("--query", metavar="KEY", help="以NDJSON格式输出某项检测的历史记录后退出，all表示全部检测项")
+    parser.add_argument("--since", type=float, default=24.0, help="--query 查询最近多少小时的记录")
+    parser.add_argument("--dns-server", action="append", metavar="ADDR",
+                        help="使用指定的DNS服务器解析（需要aiodns），可重复")
+    parser.add_argument("--dns", action="store_true", help="并发解析全部检测域名，比较系统解析器与--dns-server的冷/热延迟后退出")
+    parser.add_argument("--trace", metavar="FILE", help="将每次运行的追踪记录导出为Chrome trace-event JSON")
+    parser.add_argument("--metrics-file", metavar="FILE",
+                        help="每次运行后将检测结果与耗时以Prometheus文本格式写入文件（供textfile collector读取）")
+    parser.add_argument("--proxies", metavar="FILE", help="代理列表文件（每行一个），通过每个代理分别运行全部检测")
+    parser.add_argument("--fanout", type=int, default=16, help="--proxies 模式下同时检测的代理数")
+    parser.add_argument("--lang", default="zh_CN", choices=["zh_CN", "zh_TW", "en_US"], help="输出语言")
+    return parser.parse_args(argv)
+
+
+def emit(record, as_json):
+    if as_json:
+        line = json.dumps(record, ensure_ascii=False)
+    else:
+        value = record["value"]
+        if isinstance(value, dict):
+            value = json.dumps(value, ensure_ascii=False)
+        line = f"[{record['run']}] {record['key']}: {value}"
+    sys.stdout.write(line + "\n")
+    sys.stdout.flush()
+
+
+async def run_once(lang_manager, session_manager, geo_cache, history, metrics, run_index, args):
+    run_ts = time.time()
+    started = time.perf_counter()
+
+    async def update_callback(key, value):
+        emit({
+            "run": run_index,
+            "timestamp": datetime.datetime.now().astimezone().isoformat(),
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+            "key": key,
+            "value": value
+        }, args.json)
+
+    worker = AsyncWorker(lang_manager, session_manager=session_manager, throughput=args.throughput,
+                         geo_cache=geo_cache)
+    results = await RunController(budget=args.deadline or None).run(worker, update_callback=update_callback)
+    if history and results is not None:
+        history.record_run(worker, results, run_ts=run_ts, duration=time.perf_counter() - started)
+    if metrics and results is not None:
+        metrics.record_run(worker, results, duration=time.perf_counter() - started, run_ts=run_ts)
+        metrics.write_textfile(args.metrics_file)
+    if args.trace and worker.tracer:
+        path = args.trace
+        if args.repeat != 1:
+            # 多次运行时每次写入单独的文件
+            base, ext = os.path.splitext(path)
+            path = f"{base}-{run_index}{ext}"
+        worker.tracer.export(path)
+    return results
+
+
+async def run_fanout(lang_manager, geo_cache, run_index, args):
+    """通过代理列表中的每个代理运行检测，每个代理完成时输出一行"""
+    fanout = ProxyFanout(lang_manager, load_proxies(args.proxies), concurrency=args.fanout,
+                         budget=args.deadline or None, geo_cache=geo_cache, throughput=args.throughput)
+
+    async def on_row(proxy, row, elapsed):
+        if args.json:
+            emit({
+                "run": run_index,
+                "timestamp": datetime.datetime.now().astimezone().isoformat(),
+                "elapsed_ms": None if elapsed is None else round(elapsed * 1000, 2),
+                "key": "proxy",
+                "proxy": proxy,
+                "value": row
+            }, True)
+        else:
+            cells = row.get("error") if "error" in row else " ".join(
+                f"{key}={cell['status']}" for key, cell in row.items())
+            emit({"run": run_index, "key": proxy, "value": cells}, False)
+
+    await fanout.run(on_row)
+    summary = fanout.summary()
+    if args.json:
+        emit({"run": run_index, "key": "summary", "value": summary}, True)
+    else:
+        emit({"run": run_index, "key": "summary",
+              "value": " ".join(f"{key}={item['ok']}/{item['total']}" for key, item in summary.items())}, False)
+
+
+async def run_dns(args):
+    report = await benchmark_dns(target_domains(ENDPOINTS), nameservers=args.dns_server or ())
+
+    def fmt(value):
+        return "-" if value is None else f"{value:.1f}"
+
+    for host, entry in report["domains"].items():
+        if args.json:
+            emit({"key": "dns", "domain": host, "value": entry}, True)
+            continue
+        cells = []
+        for name, result in entry["results"].items():
+            if result["error"]:
+                cells.append(f"{name}={result['error']}")
+            else:
+                cells.append(f"{name}={fmt(result['cold_ms'])}/{fmt(result['warm_ms'])}ms")
+        flag = " MISMATCH" if entry["mismatch"] else ""
+        emit({"run": "dns", "key": host, "value": " ".join(cells) + flag}, False)
+
+
+def query_history(args):
+    history = HistoryStore()
+    try:
+        key = None if args.query == "all" else args.query
+        for row in history.query(key, start=time.time() - args.since * 3600):
+            sys.stdout.write(json.dumps(row, ensure_ascii=False) + "\n")
+    finally:
+        history.close()
+
+
+async def run(args):
+    lang_manager = LanguageManager(args.lang)
+    # 多次运行之间复用连接池
+    session_manager = SessionManager(force_cold=args.cold, nameservers=args.dns_server)
+    geo_cache = None if args.no_geo_cache else GeoCache()
+    history = None
+    # 代理模式的结果不写入历史记录，历史只记录本机直连出口
+    if not args.no_history and not args.proxies:
+        history = HistoryStore()
+        history.compact()
+    # 指标跨运行累计，同样只记录本机直连出口
+    metrics = CheckMetrics() if args.metrics_file and not args.proxies else None
+    run_index = 0
+    try:
+        while args.repeat <= 0 or run_index < args.repeat:
+            run_index += 1
+            if args.proxies:
+                await run_fanout(lang_manager, geo_cache, run_index, args)
+            else:
+                await run_once(lang_manager, session_manager, geo_cache, history, metrics, run_index, args)
+            if args.repeat <= 0 or run_index < args.repeat:
+                await asyncio.sleep(args.interval)
+    finally:
+        await session_manager.close()
+        if geo_cache:
+            geo_cache.close()
+        if history:
+            history.close()
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.query:
+        query_history(args)
+        return 0
+    if args.dns:
+        try:
+            asyncio.run(run_dns(args))
+        except RuntimeError as e:
+            sys.stderr.write(f"{e}\n")
+            return 2
+        return 0
+    try:
+        asyncio.run(run(args))
+    except KeyboardInterrupt:
+        return 130
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+import asyncio
+import socket
+import time
+from urllib.parse import urlsplit
+
+from aiohttp.resolver import ThreadedResolver
+
+
+def create_resolver(nameservers=None):
+    """创建aiohttp解析器：未指定DNS服务器时使用系统解析（线程池getaddrinfo），
+    否则通过aiodns直接查询指定的服务器"""
+    if not nameservers:
+        return ThreadedResolver()
+    # 异步解析器为可选依赖
+    try:
+        import aiodns  # noqa: F401
+    except ImportError:
+        raise RuntimeError("Custom DNS servers require the aiodns package") from None
+    from aiohttp.resolver import AsyncResolver
+    return AsyncResolver(nameservers=list(nameservers))
+
+
+def target_domains(endpoints):
+    """从检测地址表中提取需要解析的域名（跳过IP地址）"""
+    urls = []
+    for value in endpoints.values():
+        urls.extend(value if isinstance(value, list) else [value])
+    domains = []
+    for url in urls:
+        host = urlsplit(url).hostname
+        if not host:
+            continue
+        try:
+            socket.inet_pton(socket.AF_INET6 if ':' in host else socket.AF_INET, host)
+            continue
+        except OSError:
+            pass
+        domains.append(host)
+    return list(dict.fromkeys(domains))
+
+
+async def _resolve(resolver, host, timeout):
+    started = time.perf_counter()
+    try:
+        answers = await asyncio.wait_for(resolver.resolve(host, 0, family=socket.AF_UNSPEC), timeout)
+    except asyncio.TimeoutError:
+        return {"ms": None, "addresses": [], "error": "timeout"}
+    except Exception as e:
+        return {"ms": None, "addresses": [], "error": type(e).__name__}
+    elapsed = (time.perf_counter() - started) * 1000
+    return {"ms": elapsed, "addresses": sorted({answer["host"] for answer in answers}), "error": None}
+
+
+async def benchmark_dns(domains, nameservers=(), concurrency=16, timeout=5):
+    """并发解析全部域名：系统解析器以及每个指定的DNS服务器各一个解析器
+
+    每个域名连续解析两次：第一次为冷查询（系统或上游可能已有缓存，无法强制清空），
+    第二次为热查询，用于观察缓存是否生效。返回
+    {"resolvers": [...], "domains": {域名: {"results": {解析器: {...}}, "mismatch": bool}}}。
+    """
+    resolvers = {"system": create_resolver()}
+    for server in nameservers:
+        resolvers[server] = create_resolver([server])
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def measure(name, resolver, host):
+        async with semaphore:
+            cold = await _resolve(resolver, host, timeout)
+            warm = await _resolve(resolver, host, timeout)
+        return name, host, {
+            "cold_ms": cold["ms"],
+            "warm_ms": warm["ms"],
+            # 热查询明显快于冷查询，说明命中了缓存
+            "cached": cold["ms"] is not None and warm["ms"] is not None and warm["ms"] < cold["ms"] / 2,
+            "addresses": cold["addresses"] or warm["addresses"],
+            "error": cold["error"] if cold["error"] and warm["error"] else None
+        }
+
+    try:
+        measurements = await asyncio.gather(*(
+            measure(name, resolver, host) for name, resolver in resolvers.items() for host in domains
+        ))
+    finally:
+        for resolver in resolvers.values():
+            await resolver.close()
+
+    report = {host: {"results": {}, "mismatch": False} for host in domains}
+    for name, host, result in measurements:
+        report[host]["results"][name] = result
+    for entry in report.values():
+        # 各解析器的应答集合不同（CDN按解析器位置调度时也会出现）
+        answers = {tuple(result["addresses"]) for result in entry["results"].values() if result["addresses"]}
+        entry["mismatch"] = len(answers) > 1
+    return {"resolvers": list(resolvers), "domains": report}
@@ -0,0 +1,94 @@
+import asyncio
+import time
+
+from history import result_rows
+from runner import RunController
+from session import SessionManager
+from worker import AsyncWorker
+
+
+def load_proxies(path):
+    """读取代理列表文件：每行一个代理地址，忽略空行与#开头的注释"""
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = (line.strip() for line in f)
+        return [line for line in lines if line and not line.startswith('#')]
+
+
+class ProxyFanout:
+    """通过多个出口代理分别运行全部检测，得到 代理 × 检测项 的结果矩阵
+
+    全局信号量限制同时运行的代理数，每个代理使用独立且有上限的连接池，
+    运行结束即关闭，因此连接数（文件描述符）不超过 concurrency × limit_per_proxy。
+    每个代理只保留压缩后的一行结果，不保留worker本身。
+    """
+
+    def __init__(self, lang_manager, proxies, concurrency=16, limit_per_proxy=4, budget=30.0,
+                 geo_cache=None, **worker_options):
+        self.lang_manager = lang_manager
+        self.proxies = list(dict.fromkeys(proxies))
+        # 同时运行检测的代理数上限
+        self.concurrency = concurrency
+        # 每个代理连接池的连接上限
+        self.limit_per_proxy = limit_per_proxy
+        # 单个代理一轮检测的时间预算（秒）
+        self.budget = budget
+        self.geo_cache = geo_cache
+        self.worker_options = worker_options
+        self.matrix = {}
+
+    async def run_proxy(self, proxy):
+        """通过一个代理运行全部检测，返回 {key: {"status", "ok", "value", "text"}}"""
+        session_manager = SessionManager(limit=self.limit_per_proxy, limit_per_host=self.limit_per_proxy,
+                                         proxy=proxy)
+        worker = AsyncWorker(self.lang_manager, session_manager=session_manager, geo_cache=self.geo_cache,
+                             max_concurrency=self.limit_per_proxy, **self.worker_options)
+        started = time.perf_counter()
+        try:
+            results = await RunController(budget=self.budget).run(worker)
+        finally:
+            await session_manager.close()
+        row = {
+            key: {"status": status, "ok": bool(ok), "value": value, "text": text}
+            for _, key, status, ok, value, text in result_rows(worker, results, None)
+        }
+        # 被跳过的检测（如网络受限时的流媒体检测）也占一列
+        for check in worker.registry:
+            row.setdefault(check.key, {"status": "skipped", "ok": False, "value": None, "text": None})
+        return row, time.perf_counter() - started
+
+    async def run(self, on_row=None):
+        """并发运行全部代理，on_row(proxy, row, elapsed) 在每个代理完成时被调用"""
+        self.matrix = {}
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run_one(proxy):
+            async with semaphore:
+                try:
+                    row, elapsed = await self.run_proxy(proxy)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    row, elapsed = {"error": str(e)}, None
+            self.matrix[proxy] = row
+            if on_row:
+                await on_row(proxy, row, elapsed)
+
+        tasks = [asyncio.create_task(run_one(proxy)) for proxy in self.proxies]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        return self.matrix
+
+    def summary(self):
+        """各检测项在全部代理上的成功数"""
+        counts = {}
+        for row in self.matrix.values():
+            for key, cell in row.items():
+                if isinstance(cell, dict):
+                    counts.setdefault(key, [0, 0])
+                    counts[key][0] += cell["ok"]
+                    counts[key][1] += 1
+        return {key: {"ok": ok, "total": total} for key, (ok, total) in counts.items()}
@@ -0,0 +1,60 @@
+import json
+import sqlite3
+import time
+
+from storage import data_path
+
+
+class GeoCache:
+    """IP地理位置的本地缓存（SQLite），支持过期时间、LRU淘汰与容量上限"""
+
+    def __init__(self, path=None, ttl=7 * 24 * 3600, max_entries=1000):
+        self.path = path or data_path("geocache.sqlite3")
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # 命中/未命中计数，用于诊断
+        self.hits = 0
+        self.misses = 0
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS geo ("
+            "ip TEXT PRIMARY KEY, data TEXT NOT NULL, fetched REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS geo_accessed ON geo (accessed)")
+        self._conn.commit()
+
+    def get(self, ip):
+        """返回未过期的缓存数据，否则返回None"""
+        now = time.time()
+        row = self._conn.execute("SELECT data, fetched FROM geo WHERE ip = ?", (ip,)).fetchone()
+        if row is None or now - row[1] > self.ttl:
+            self.misses += 1
+            return None
+        self._conn.execute("UPDATE geo SET accessed = ? WHERE ip = ?", (now, ip))
+        self._conn.commit()
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, ip, data):
+        now = time.time()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO geo (ip, data, fetched, accessed) VALUES (?, ?, ?, ?)",
+            (ip, json.dumps(data, ensure_ascii=False), now, now)
+        )
+        # 超出容量时淘汰最久未访问的条目
+        self._conn.execute(
+            "DELETE FROM geo WHERE ip IN (SELECT ip FROM geo ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+        self._conn.commit()
+
+    def stats(self):
+        size = self._conn.execute("SELECT COUNT(*) FROM geo").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "size": size}
+
+    def clear(self):
+        self._conn.execute("DELETE FROM geo")
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
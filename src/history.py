@@ -0,0 +1,166 @@
+import asyncio
+import json
+import sqlite3
+import time
+
+from latency import percentile
+from storage import data_path
+
+# 视为检测成功的状态
+OK_STATUSES = {"ok", "free", "available", "originals_only"}
+
+
+def result_rows(worker, results, run_ts):
+    """将一轮检测结果转换为 (ts, key, status, ok, value, text) 行"""
+    errors = worker.last_schedule.errors if worker.last_schedule else {}
+    rows = []
+    for key, result in results.items():
+        detail = worker.check_status.get(key, {})
+        status = detail.get("status")
+        if key == "ip_info":
+            status = "error" if "error" in result else "ok"
+        elif status is None:
+            error = errors.get(key)
+            if isinstance(error, asyncio.TimeoutError):
+                status = "timeout"
+            elif error is not None:
+                status = "error"
+            else:
+                status = "ok"
+        # 数值列：延迟（毫秒）、自由度比例或吞吐量（字节/秒）
+        value = detail.get("latency_ms", detail.get("bps"))
+        # 自由度比例只在全部探测完成后才有记录，提前判定时的计数不代表实际结果，此时只记录ok列的判定
+        if key == "network_status" and detail.get("total"):
+            value = detail["success"] / detail["total"]
+        text = result if isinstance(result, str) or result is None else json.dumps(result, ensure_ascii=False)
+        rows.append((run_ts, key, status, int(status in OK_STATUSES), value, text))
+    return rows
+
+
+class HistoryStore:
+    """检测结果的本地只追加存储（SQLite WAL），支持时间范围查询与旧数据降采样"""
+
+    def __init__(self, path=None, raw_retention=7 * 24 * 3600, rollup_bucket=3600,
+                 rollup_retention=365 * 24 * 3600):
+        self.path = path or data_path("history.sqlite3")
+        # 原始数据保留时长，超过后按rollup_bucket聚合
+        self.raw_retention = raw_retention
+        self.rollup_bucket = rollup_bucket
+        self.rollup_retention = rollup_retention
+        # 上次降采样的时间，长时间运行（监控、HTTP服务）时在写入后按桶间隔重新降采样
+        self._last_compact = None
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            " ts REAL PRIMARY KEY, duration REAL);"
+            "CREATE TABLE IF NOT EXISTS results ("
+            " ts REAL NOT NULL, key TEXT NOT NULL, status TEXT, ok INTEGER NOT NULL,"
+            " value REAL, text TEXT);"
+            "CREATE INDEX IF NOT EXISTS results_key_ts ON results (key, ts);"
+            "CREATE TABLE IF NOT EXISTS rollups ("
+            " bucket REAL NOT NULL, key TEXT NOT NULL, count INTEGER NOT NULL, ok_count INTEGER NOT NULL,"
+            " value_avg REAL, value_min REAL, value_max REAL, PRIMARY KEY (bucket, key));"
+        )
+        self._conn.commit()
+
+    def record_run(self, worker, results, run_ts=None, duration=None):
+        """在一个事务中批量写入一轮检测的全部结果"""
+        run_ts = run_ts or time.time()
+        with self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO runs (ts, duration) VALUES (?, ?)", (run_ts, duration))
+            self._conn.executemany(
+                "INSERT INTO results (ts, key, status, ok, value, text) VALUES (?, ?, ?, ?, ?, ?)",
+                result_rows(worker, results, run_ts)
+            )
+        now = time.time()
+        if self._last_compact is None or now - self._last_compact >= self.rollup_bucket:
+            self.compact(now)
+        return run_ts
+
+    def query(self, key=None, start=None, end=None, limit=None):
+        """按检测项与时间范围查询原始结果，按时间升序"""
+        sql = "SELECT ts, key, status, ok, value, text FROM results WHERE ts >= ? AND ts <= ?"
+        params = [start or 0, end or time.time()]
+        if key:
+            sql += " AND key = ?"
+            params.append(key)
+        sql += " ORDER BY ts"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        columns = ("ts", "key", "status", "ok", "value", "text")
+        return [dict(zip(columns, row)) for row in self._conn.execute(sql, params)]
+
+    def rollups(self, key=None, start=None, end=None):
+        """查询已降采样的聚合数据"""
+        sql = ("SELECT bucket, key, count, ok_count, value_avg, value_min, value_max FROM rollups"
+               " WHERE bucket >= ? AND bucket <= ?")
+        params = [start or 0, end or time.time()]
+        if key:
+            sql += " AND key = ?"
+            params.append(key)
+        sql += " ORDER BY bucket"
+        columns = ("bucket", "key", "count", "ok_count", "value_avg", "value_min", "value_max")
+        return [dict(zip(columns, row)) for row in self._conn.execute(sql, params)]
+
+    def availability(self, key, start=None, end=None):
+        """时间范围内检测成功的比例，包含已降采样的数据"""
+        raw = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(ok), 0) FROM results WHERE key = ? AND ts >= ? AND ts <= ?",
+            (key, start or 0, end or time.time())
+        ).fetchone()
+        rolled = self._conn.execute(
+            "SELECT COALESCE(SUM(count), 0), COALESCE(SUM(ok_count), 0) FROM rollups"
+            " WHERE key = ? AND bucket >= ? AND bucket <= ?",
+            (key, start or 0, end or time.time())
+        ).fetchone()
+        total = raw[0] + rolled[0]
+        return (raw[1] + rolled[1]) / total if total else None
+
+    def value_percentile(self, key, pct, start=None, end=None):
+        """时间范围内数值列的百分位数（仅原始数据）"""
+        values = [row[0] for row in self._conn.execute(
+            "SELECT value FROM results WHERE key = ? AND ts >= ? AND ts <= ? AND value IS NOT NULL",
+            (key, start or 0, end or time.time())
+        )]
+        return percentile(values, pct)
+
+    def first_failure(self, key, start=None, end=None):
+        """最近一段连续失败的开始时间，当前未失败时返回None"""
+        last_ok = self._conn.execute(
+            "SELECT MAX(ts) FROM results WHERE key = ? AND ok = 1 AND ts >= ? AND ts <= ?",
+            (key, start or 0, end or time.time())
+        ).fetchone()[0]
+        row = self._conn.execute(
+            "SELECT MIN(ts) FROM results WHERE key = ? AND ok = 0 AND ts > ? AND ts <= ?",
+            (key, last_ok if last_ok is not None else (start or 0), end or time.time())
+        ).fetchone()
+        return row[0]
+
+    def compact(self, now=None):
+        """将超过保留期的原始数据按时间桶聚合后删除，并清理过期的聚合数据"""
+        now = now or time.time()
+        self._last_compact = now
+        cutoff = now - self.raw_retention
+        bucket = self.rollup_bucket
+        with self._conn:
+            self._conn.execute(
+                "INSERT INTO rollups (bucket, key, count, ok_count, value_avg, value_min, value_max)"
+                " SELECT CAST(ts / ? AS INTEGER) * ?, key, COUNT(*), SUM(ok), AVG(value), MIN(value), MAX(value)"
+                " FROM results WHERE ts < ? GROUP BY 1, key"
+                " ON CONFLICT (bucket, key) DO UPDATE SET"
+                " value_avg = CASE WHEN value_avg IS NULL THEN excluded.value_avg"
+                " WHEN excluded.value_avg IS NULL THEN value_avg"
+                " ELSE (value_avg * count + excluded.value_avg * excluded.count) / (count + excluded.count) END,"
+                " count = count + excluded.count, ok_count = ok_count + excluded.ok_count,"
+                " value_min = MIN(value_min, excluded.value_min), value_max = MAX(value_max, excluded.value_max)",
+                (bucket, bucket, cutoff)
+            )
+            self._conn.execute("DELETE FROM results WHERE ts < ?", (cutoff,))
+            self._conn.execute("DELETE FROM runs WHERE ts < ?", (cutoff,))
+            self._conn.execute("DELETE FROM rollups WHERE bucket < ?", (now - self.rollup_retention,))
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,108 @@
+import json
+import os
+
+from storage import data_path
+
+LANG_DIR = os.path.join(os.path.dirname(__file__), 'assets', 'lang')
+SUPPORTED_LANGS = ['zh_CN', 'zh_TW', 'en_US']
+# 编译后目录格式的版本号，格式变化时递增以使旧缓存失效
+CATALOG_VERSION = 1
+# 受限制的国家代码，警告界面与IP检测共用
+RESTRICTED_COUNTRY_CODES = ['TM', 'IR', 'KP', 'MM']
+
+
+def load_language(lang_code):
+    """加载指定语言的翻译文本"""
+    import yaml
+
+    lang_file = os.path.join(LANG_DIR, f'{lang_code}.yaml')
+    try:
+        with open(lang_file, 'r', encoding='utf-8') as f:
+            return yaml.safe_load(f)
+    except Exception as e:
+        print(f"Error loading language file {lang_file}: {e}")
+        return None
+
+
+def flatten_translations(tree, prefix=''):
+    """将嵌套的翻译字典展开为以点号路径为键的扁平字典"""
+    flat = {}
+    for key, value in tree.items():
+        path = f'{prefix}{key}'
+        if isinstance(value, dict):
+            flat.update(flatten_translations(value, f'{path}.'))
+        else:
+            flat[path] = value
+    return flat
+
+
+def compile_language(lang_code):
+    """从YAML编译扁平翻译目录，并以JSON格式缓存，YAML修改时间变化后自动重建"""
+    lang_file = os.path.join(LANG_DIR, f'{lang_code}.yaml')
+    catalog_file = data_path(os.path.join('lang', f'{lang_code}.json'))
+    try:
+        source_mtime = os.path.getmtime(lang_file)
+    except OSError:
+        source_mtime = None
+
+    try:
+        with open(catalog_file, 'r', encoding='utf-8') as f:
+            catalog = json.load(f)
+        if catalog.get('version') == CATALOG_VERSION and catalog.get('source_mtime') == source_mtime:
+            return catalog['texts']
+    except (OSError, ValueError):
+        pass
+
+    translation = load_language(lang_code)
+    if not translation:
+        return None
+    texts = flatten_translations(translation)
+    try:
+        os.makedirs(os.path.dirname(catalog_file), exist_ok=True)
+        with open(catalog_file, 'w', encoding='utf-8') as f:
+            json.dump({'version': CATALOG_VERSION, 'source_mtime': source_mtime, 'texts': texts}, f, ensure_ascii=False)
+    except OSError as e:
+        print(f"Error writing language catalog {catalog_file}: {e}")
+    return texts
+
+
+class LanguageManager:
+    def __init__(self, default_lang='zh_CN'):
+        self.current_lang = default_lang if default_lang in SUPPORTED_LANGS else 'zh_CN'
+        # 按需加载的扁平翻译目录
+        self.translations = {}
+        self._current_texts = None
+
+    def load_translations(self, lang):
+        """首次使用某种语言时加载其翻译目录"""
+        if lang not in self.translations:
+            self.translations[lang] = compile_language(lang)
+        return self.translations[lang]
+
+    def get_text(self, key_path, lang=None):
+        """获取指定路径的翻译文本"""
+        if lang is None or lang == self.current_lang:
+            texts = self._current_texts
+            if texts is None:
+                texts = self._current_texts = self.load_translations(self.current_lang) or {}
+        else:
+            if lang not in SUPPORTED_LANGS:
+                lang = 'zh_CN'  # 默认使用简体中文
+            texts = self.load_translations(lang) or {}
+        # 没有找到翻译时返回键路径
+        return texts.get(key_path, key_path)
+
+    def set_language(self, lang_code):
+        """设置当前语言"""
+        if lang_code in SUPPORTED_LANGS:
+            self.current_lang = lang_code
+            self._current_texts = None
+            return True
+        return False
+
+
+if __name__ == '__main__':
+    # 预先编译全部语言目录
+    for lang in SUPPORTED_LANGS:
+        texts = compile_language(lang)
+        print(f"{lang}: {len(texts or {})} entries")
@@ -0,0 +1,185 @@
+import asyncio
+import socket
+import time
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from tracing import create_trace_config
+
+
+def _ms(start_ns, end_ns):
+    if start_ns is None or end_ns is None:
+        return None
+    return (end_ns - start_ns) / 1_000_000
+
+
+def percentile(values, pct):
+    """线性插值百分位数，values为空时返回None"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def jitter(values):
+    """相邻样本差值绝对值的平均数"""
+    if len(values) < 2:
+        return 0.0
+    return sum(abs(b - a) for a, b in zip(values, values[1:])) / (len(values) - 1)
+
+
+def _create_trace_config():
+    """基于TraceConfig记录每个请求各阶段的perf_counter_ns时间戳"""
+    trace_config = aiohttp.TraceConfig()
+
+    def mark(name):
+        async def handler(session, ctx, params):
+            ctx.trace_request_ctx[name] = time.perf_counter_ns()
+        return handler
+
+    trace_config.on_request_start.append(mark("request_start"))
+    trace_config.on_dns_resolvehost_start.append(mark("dns_start"))
+    trace_config.on_dns_resolvehost_end.append(mark("dns_end"))
+    trace_config.on_connection_create_start.append(mark("connect_start"))
+    trace_config.on_connection_create_end.append(mark("connect_end"))
+    trace_config.on_request_headers_sent.append(mark("headers_sent"))
+    trace_config.on_request_end.append(mark("response_start"))
+    return trace_config
+
+
+async def _tcp_connect_time(host, port, timeout, family=0):
+    """单独测量到同一地址的TCP建连耗时，用于从建连总耗时中拆分出TLS握手"""
+    loop = asyncio.get_running_loop()
+    infos = await loop.getaddrinfo(host, port, family=family, type=socket.SOCK_STREAM)
+    family, _, _, _, address = infos[0]
+    start = time.perf_counter_ns()
+    _, writer = await asyncio.wait_for(
+        asyncio.open_connection(address[0], port, family=family), timeout
+    )
+    end = time.perf_counter_ns()
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except Exception:
+        pass
+    return _ms(start, end)
+
+
+async def measure_latency(url, samples=5, method="HEAD", timeout=5, headers=None, connector=None, proxy=None,
+                          family=0, resolver=None, budget=None):
+    """对url连续采样，首个样本使用全新连接（冷），其余复用连接（热）
+
+    返回各阶段耗时（毫秒）：DNS、TCP建连、TLS握手、首字节时间，
+    以及全部样本总耗时的p50/p95/抖动。TLS握手时间为建连总耗时减去
+    单独测得的TCP建连时间，属于估算值。经代理（proxy或代理connector）
+    测量时建连阶段包含代理，不再拆分TCP/TLS。family为socket.AF_INET或
+    AF_INET6时只使用该地址族连接；resolver为aiohttp解析器，默认使用系统解析。
+    budget为全部测量（含拆分TLS用的TCP建连）共用的总时间（秒），每个样本的超时不超过剩余时间，
+    用完后不再采样，按已完成的样本返回结果；为None时不限制。
+    """
+    started = time.perf_counter()
+
+    def remaining():
+        return None if budget is None else budget - (time.perf_counter() - started)
+
+    parts = urlsplit(url)
+    is_https = parts.scheme == "https"
+    port = parts.port or (443 if is_https else 80)
+    proxied = connector is not None or proxy is not None
+
+    connector = connector or aiohttp.TCPConnector(limit_per_host=1, family=family, resolver=resolver)
+    sample_results = []
+    async with aiohttp.ClientSession(connector=connector, proxy=proxy,
+                                     trace_configs=[_create_trace_config(), create_trace_config()]) as session:
+        for index in range(samples):
+            left = remaining()
+            if left is not None and left <= 0:
+                break
+            marks = {}
+            try:
+                # 与原先的HEAD请求一致不跟随重定向，否则跳转会计入总耗时并覆盖首跳的连接阶段时间
+                async with session.request(
+                    method, url, headers=headers, allow_redirects=False,
+                    timeout=aiohttp.ClientTimeout(total=timeout if left is None else min(timeout, left)),
+                    trace_request_ctx=marks
+                ) as response:
+                    end = time.perf_counter_ns()
+                    status = response.status
+            except Exception:
+                # 冷样本失败说明目标不可达，直接抛出；热样本失败则忽略
+                if index == 0:
+                    raise
+                continue
+            sample_results.append({
+                "cold": index == 0,
+                "status": status,
+                "dns_ms": _ms(marks.get("dns_start"), marks.get("dns_end")),
+                "connect_ms": _ms(marks.get("connect_start"), marks.get("connect_end")),
+                "ttfb_ms": _ms(marks.get("headers_sent"), marks.get("response_start")),
+                "total_ms": _ms(marks.get("request_start"), end)
+            })
+
+    cold = sample_results[0]
+    tcp_ms = None
+    tls_ms = None
+    if cold["connect_ms"] is not None and not proxied:
+        # aiohttp的建连阶段包含DNS解析，先扣除DNS耗时
+        connect_ms = max(cold["connect_ms"] - (cold["dns_ms"] or 0.0), 0.0)
+        if is_https:
+            left = remaining()
+            # 预算已用完时不再拆分TLS握手
+            if left is None or left > 0:
+                try:
+                    tcp_ms = await _tcp_connect_time(parts.hostname, port,
+                                                     timeout if left is None else min(timeout, left), family)
+                    tls_ms = max(connect_ms - tcp_ms, 0.0)
+                except Exception:
+                    tcp_ms = None
+        else:
+            tcp_ms = connect_ms
+
+    totals = [sample["total_ms"] for sample in sample_results]
+    warm_ttfb = [sample["ttfb_ms"] for sample in sample_results[1:] if sample["ttfb_ms"] is not None]
+    return {
+        "url": url,
+        "samples": sample_results,
+        "dns_ms": cold["dns_ms"],
+        "tcp_connect_ms": tcp_ms,
+        "tls_handshake_ms": tls_ms,
+        "ttfb_ms": percentile(warm_ttfb, 50) if warm_ttfb else cold["ttfb_ms"],
+        "cold_total_ms": cold["total_ms"],
+        "p50_ms": percentile(totals, 50),
+        "p95_ms": percentile(totals, 95),
+        "jitter_ms": jitter(totals)
+    }
+
+
+async def compare_families(urls, samples=3, timeout=5):
+    """对同一组目标分别只用IPv4与只用IPv6测量延迟，两个地址族同时进行
+
+    返回 {"v4": {...}, "v6": {...}}，每个地址族包含各目标的报告或错误，
+    以及全部可达目标冷连接总耗时与p50的中位数。
+    """
+    async def measure(url, family):
+        try:
+            return await measure_latency(url, samples=samples, timeout=timeout, family=family)
+        except Exception as e:
+            return {"url": url, "error": type(e).__name__}
+
+    families = {"v4": socket.AF_INET, "v6": socket.AF_INET6}
+    reports = await asyncio.gather(*(measure(url, family) for family in families.values() for url in urls))
+    result = {}
+    for index, name in enumerate(families):
+        targets = reports[index * len(urls):(index + 1) * len(urls)]
+        reachable = [report for report in targets if "error" not in report]
+        result[name] = {
+            "targets": targets,
+            "reachable": len(reachable),
+            "cold_ms": percentile([report["cold_total_ms"] for report in reachable], 50),
+            "p50_ms": percentile([report["p50_ms"] for report in reachable], 50)
+        }
+    return result
@@ -1,404 +1,52 @@
-import flet as ft
-import aiohttp
 import asyncio
-import json
-from bs4 import BeautifulSoup
-import datetime
-import sys
-import yaml
+import importlib
 import os
+import time
 
-def load_language(lang_code):
-    """加载指定语言的翻译文本"""
-    lang_file = os.path.join(os.path.dirname(__file__), 'assets', 'lang', f'{lang_code}.yaml')
-    try:
-        with open(lang_file, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f)
-    except Exception as e:
-        print(f"Error loading language file {lang_file}: {e}")
-        return None
-
-class LanguageManager:
-    def __init__(self, default_lang='zh_CN'):
-        self.current_lang = default_lang
-        self.translations = {}
-        self.load_translations()
-
-    def load_translations(self):
-        """加载所有支持的语言"""
-        supported_langs = ['zh_CN', 'zh_TW', 'en_US']
-        for lang in supported_langs:
-            self.translations[lang] = load_language(lang)
-
-    def get_text(self, key_path, lang=None):
-        """获取指定路径的翻译文本"""
-        lang = lang or self.current_lang
-        if lang not in self.translations:
-            lang = 'zh_CN'  # 默认使用简体中文
-        
-        translation = self.translations[lang]
-        if not translation:
-            return key_path  # 如果没有找到翻译文件，返回键路径
-        
-        # 通过路径获取翻译
-        keys = key_path.split('.')
-        value = translation
-        for key in keys:
-            if isinstance(value, dict) and key in value:
-                value = value[key]
-            else:
-                return key_path
-        return value
-
-    def set_language(self, lang_code):
-        """设置当前语言"""
-        if lang_code in self.translations:
-            self.current_lang = lang_code
-            return True
-        return False
-
-class AsyncWorker:
-    # 定义受限制的国家代码
-    RESTRICTED_COUNTRY_CODES = ['TM', 'IR', 'KP', 'MM']
-
-    def __init__(self, lang_manager):
-        self.session = None
-        self.lang_manager = lang_manager
-        # 定义受限制的国家信息
-        self.restricted_countries = {
-            code: {
-                lang: self.lang_manager.get_text(f'countries.{code}')
-                for lang in ['zh_CN', 'zh_TW', 'en_US']
-            }
-            for code in self.RESTRICTED_COUNTRY_CODES
-        }
-        # 定义通用请求头
-        self.browser_headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'sec-ch-ua': '"Google Chrome";v="125", "Chromium";v="125", "Not.A/Brand";v="24"',
-            'sec-ch-ua-mobile': '?0',
-            'sec-ch-ua-platform': '"Windows"',
-            'sec-fetch-site': 'none',
-            'sec-fetch-mode': 'navigate',
-            'sec-fetch-user': '?1',
-            'sec-fetch-dest': 'document'
-        }
-
-    async def __aenter__(self):
-        await self.create_session()
-        return self
-
-    async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.close_session()
-
-    async def create_session(self):
-        if not self.session:
-            self.session = aiohttp.ClientSession()
-
-    async def close_session(self):
-        if self.session:
-            await self.session.close()
-            self.session = None
-
-    async def get_ip_info(self):
-        try:
-            # 首先获取国外IP信息
-            async with self.session.get('http://ip-api.com/json', timeout=5) as response:
-                foreign_ip_info = await response.json()
-                
-            # 检查是否在受限制国家
-            if foreign_ip_info.get("countryCode") in self.RESTRICTED_COUNTRY_CODES:
-                return {
-                    "ip": foreign_ip_info["query"],
-                    "region": f'{foreign_ip_info["regionName"]}, {foreign_ip_info["country"]}',
-                    "restricted": True,
-                    "country_code": foreign_ip_info["countryCode"]
-                }
-            
-            # 如果不在受限制国家，继续获取国内IP
-            async with self.session.get('https://4.ipw.cn', timeout=5) as response:
-                domestic_ip = await response.text()
-                domestic_ip = domestic_ip.strip()
-
-            # 获取国内IP的详细信息
-            async with self.session.get(f'http://ip-api.com/json/{domestic_ip}', timeout=5) as response:
-                domestic_ip_info = await response.json()
-
-            # 比较两个IP是否相同
-            if domestic_ip == foreign_ip_info["query"]:
-                return {"ip": domestic_ip, "region": f'{domestic_ip_info["regionName"]}, {domestic_ip_info["country"]}'}
-            else:
-                return {
-                    "domestic_ip": domestic_ip,
-                    "domestic_region": f'{domestic_ip_info["regionName"]}, {domestic_ip_info["country"]}',
-                    "foreign_ip": foreign_ip_info["query"],
-                    "foreign_region": f'{foreign_ip_info["regionName"]}, {foreign_ip_info["country"]}'
-                }
-        except asyncio.TimeoutError:
-            return {"error": self.lang_manager.get_text("errors.timeout")}
-        except Exception as e:
-            return {"error": f"{self.lang_manager.get_text('errors.ip_error_prefix')}{e}"}
-
-    async def check_network_freedom(self):
-        urls = [
-            'https://www.v2ex.com/generate_204',
-            'https://www.youtube.com/generate_204',
-            'https://mullvad.net/en',
-            'https://www.theguardian.com/international',
-            'https://bridges.torproject.org'
-        ]
-        success_count = 0
-
-        for url in urls:
-            for _ in range(2):
-                try:
-                    async with self.session.head(url, timeout=2) as response:
-                        if response.status in [204, 200]:
-                            success_count += 1
-                            break
-                except asyncio.TimeoutError:
-                    continue
-                except:
-                    continue
-
-        return f"{self.lang_manager.get_text('main.network_status.status_free')}（{success_count}/{len(urls)}）" if success_count >= len(urls)/2 else self.lang_manager.get_text('main.network_status.status_restricted')
-
-    async def extract_prefdomain_url(self):
-        try:
-            async with self.session.get('https://www.google.com', timeout=5) as response:
-                content = await response.text()
-            soup = BeautifulSoup(content, 'html.parser')
-            link = soup.find('a', href=lambda href: href and 'setprefdomain' in href)
-
-            if link:
-                href = link['href']
-                domain = href.split('//')[1].split('/')[0]
-                prefdom = href.split('=')[1].split('&')[0]
-                if domain == 'www.google.com.hk' and prefdom == 'US':
-                    return 'CN'
-                else:
-                    return prefdom
-            return self.lang_manager.get_text("main.google.global")
-        except asyncio.TimeoutError:
-            return self.lang_manager.get_text("errors.google_timeout")
-        except Exception:
-            return self.lang_manager.get_text("errors.google_error")
-
-    async def raw_githubusercontent_speed_test(self):
-        try:
-            start = datetime.datetime.now()
-            async with self.session.head('https://raw.githubusercontent.com', timeout=5) as response:
-                end = datetime.datetime.now()
-                time_without_proxy = (end - start).total_seconds() * 1000
-                return f"{time_without_proxy:.2f} {self.lang_manager.get_text('network_test.speed_unit')}"
-        except asyncio.TimeoutError:
-            return self.lang_manager.get_text("errors.github_timeout")
-        except Exception as e:
-            return self.lang_manager.get_text("errors.github_error")
-
-    async def get_auto_login_name(self):
-        try:
-            headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
-            async with self.session.get('https://login.cnki.net/TopLogin/api/loginapi/IpLoginFlush', headers=headers, timeout=5) as response:
-                text = await response.text()
-                result = json.loads(text[1:-1])
-                if result.get('IsSuccess'):
-                    return result.get('ShowName')
-                return None
-        except asyncio.TimeoutError:
-            return self.lang_manager.get_text("errors.timeout")
-        except Exception:
-            return None
+# 启动计时从导入本模块开始
+_started = time.perf_counter()
 
-    async def check_netflix(self):
-        """检测Netflix解锁状态"""
-        try:
-            # 测试两个不同的Netflix内容（LEGO Ninjago和Breaking Bad）
-            urls = [
-                'https://www.netflix.com/title/81280792',
-                'https://www.netflix.com/title/70143836'
-            ]
-            
-            # 更新请求头以完全匹配shell脚本
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36',
-                'accept-language': 'en-US,en;q=0.9',
-                'sec-ch-ua': '"Google Chrome";v="125", "Chromium";v="125", "Not.A/Brand";v="24"',
-                'sec-ch-ua-mobile': '?0',
-                'sec-ch-ua-platform': '"Windows"',
-                'sec-fetch-site': 'none',
-                'sec-fetch-mode': 'navigate',
-                'sec-fetch-user': '?1',
-                'sec-fetch-dest': 'document',
-                'host': 'www.netflix.com'
-            }
-            
-            results = []
-            for url in urls:
-                try:
-                    async with self.session.get(
-                        url,
-                        headers=headers,
-                        timeout=10,
-                        allow_redirects=True  # 允许跟随重定向
-                    ) as response:
-                        results.append(response.status)
-                except:
-                    results.append(0)
-
-            # 分析结果
-            if 0 in results:
-                return self.lang_manager.get_text("main.streaming.netflix.network_error")
-            
-            if all(code == 404 for code in results):
-                return self.lang_manager.get_text("main.streaming.netflix.originals_only")
-            
-            if 403 in results:
-                return self.lang_manager.get_text("main.streaming.netflix.unavailable")
-            
-            if 200 in results:
-                # 获取区域信息
-                async with self.session.get(
-                    'https://www.netflix.com/',
-                    headers=headers,
-                    timeout=10,
-                    allow_redirects=True
-                ) as response:
-                    text = await response.text()
-                    import re
-                    region_match = re.search(r'"id":"([A-Z]{2})"', text)
-                    region = region_match.group(1) if region_match else "UNKNOWN"
-                    return self.lang_manager.get_text("main.streaming.netflix.available").format(region=region)
-            
-            return self.lang_manager.get_text("main.streaming.netflix.error").format(error=f"{results[0]}_{results[1]}")
-            
-        except Exception as e:
-            return self.lang_manager.get_text("main.streaming.netflix.error").format(error=str(e))
+import flet as ft
+from language import LanguageManager, RESTRICTED_COUNTRY_CODES
+from storage import data_path
 
-    async def check_youtube_premium(self):
-        """检测YouTube Premium解锁状态"""
-        try:
-            headers = self.browser_headers.copy()
-            headers['cookie'] = 'YSC=FSCWhKo2Zgw; VISITOR_PRIVACY_METADATA=CgJERRIEEgAgYQ%3D%3D; PREF=f7=4000; __Secure-YEC=CgtRWTBGTFExeV9Iayjele2yBjIKCgJERRIEEgAgYQ%3D%3D; SOCS=CAISOAgDEitib3FfaWRlbnRpdHlmcm9udGVuZHVpc2VydmVyXzIwMjQwNTI2LjAxX3AwGgV6aC1DTiACGgYIgMnpsgY; VISITOR_INFO1_LIVE=Di84mAIbgKY; __Secure-BUCKET=CGQ'
-            
-            async with self.session.get(
-                'https://www.youtube.com/premium',
-                headers=headers,
-                timeout=10
-            ) as response:
-                text = await response.text()
-                
-                # 检查是否重定向到google.cn
-                if 'www.google.cn' in text:
-                    return self.lang_manager.get_text("main.streaming.youtube.unavailable_cn")
-                
-                # 检查是否不可用
-                if 'Premium is not available in your country' in text.lower():
-                    return self.lang_manager.get_text("main.streaming.youtube.unavailable")
-                
-                # 获取区域信息
-                import re
-                region_match = re.search(r'"INNERTUBE_CONTEXT_GL"\s*:\s*"([^"]+)"', text)
-                region = region_match.group(1) if region_match else "UNKNOWN"
-                
-                # 检查是否可用
-                if 'ad-free' in text.lower():
-                    return self.lang_manager.get_text("main.streaming.youtube.available").format(region=region)
-                
-                return self.lang_manager.get_text("main.streaming.youtube.error")
-                
-        except Exception as e:
-            return self.lang_manager.get_text("main.streaming.youtube.network_error")
+# 启动耗时（毫秒）：导入本模块的时间与首屏（警告界面）发送完成的时间，基准测试读取
+startup_timings = {"import_ms": (time.perf_counter() - _started) * 1000, "first_frame_ms": None}
 
-    async def run_all_checks(self, update_callback=None):
-        # 首先只获取IP信息
-        try:
-            ip_info = await self.get_ip_info()
-            if update_callback:
-                await update_callback("ip_info", ip_info)
-            
-            # 如果在受限制国家，不执行其他检查
-            if ip_info.get("restricted"):
-                if update_callback:
-                    country_code = ip_info["country_code"]
-                    country_info = self.restricted_countries[country_code]
-                    await update_callback("network_status", 
-                        f"{self.lang_manager.get_text('restricted_warning.prefix')}{country_info[self.lang_manager.current_lang]}{self.lang_manager.get_text('restricted_warning.suffix')}")
-                    await update_callback("google_region", self.lang_manager.get_text("main.network_status.test_terminated"))
-                    await update_callback("github_speed", self.lang_manager.get_text("main.network_status.test_terminated"))
-                return {"ip_info": ip_info}
-        except Exception as e:
-            print(f"Error getting IP info: {e}")
-            if update_callback:
-                await update_callback("ip_info", {"error": str(e)})
-            return {}
-
-        # 如果不在受限制国家，先执行基本网络检查
-        results = {"ip_info": ip_info}
-        basic_tasks = {
-            "network_status": lambda: self.check_network_freedom(),
-            "google_region": lambda: self.extract_prefdomain_url(),
-            "github_speed": lambda: self.raw_githubusercontent_speed_test(),
-            "academic_name": lambda: self.get_auto_login_name()
-        }
-        
-        # 执行基本网络检查
-        active_tasks = {
-            key: asyncio.create_task(factory())
-            for key, factory in basic_tasks.items()
-        }
-        
-        try:
-            while active_tasks:
-                done, pending = await asyncio.wait(
-                    active_tasks.values(),
-                    return_when=asyncio.FIRST_COMPLETED
-                )
-                
-                for task in done:
-                    key = next(k for k, v in active_tasks.items() if v == task)
-                    try:
-                        results[key] = task.result()
-                        if update_callback:
-                            await update_callback(key, results[key])
-                            
-                            # 如果是网络状态检查完成，且网络自由，则开始流媒体检测
-                            if key == "network_status" and self.lang_manager.get_text("main.network_status.status_free") in results[key]:
-                                # 创建流媒体检测任务
-                                streaming_tasks = {
-                                    "netflix": lambda: self.check_netflix(),
-                                    "youtube": lambda: self.check_youtube_premium()
-                                }
-                                for streaming_key, streaming_factory in streaming_tasks.items():
-                                    active_tasks[streaming_key] = asyncio.create_task(streaming_factory())
-                    except Exception as e:
-                        results[key] = f"错误: {str(e)}"
-                        if update_callback:
-                            await update_callback(key, results[key])
-                    
-                    del active_tasks[key]
-        
-        except Exception as e:
-            print(f"Error in run_all_checks: {e}")
-            for task in active_tasks.values():
-                task.cancel()
-            
-        return results
+# 主界面与检测用到的模块（aiohttp等）在警告界面显示后于后台线程预先导入
+PRELOAD_MODULES = ["worker", "session", "geocache", "history", "monitor", "runner", "render", "snapshot"]
 
-async def main(page: ft.Page):
-    page.title = ""
-    page.window.height = 800
-    page.theme_mode = ft.ThemeMode.LIGHT
-    page.padding = 0
 
-    # 计算窗口宽度
-    content_width = 400  # 内容区域最大宽度
-    window_width = content_width + 40  # 加上内容区域的左右padding (20 * 2)
-    page.window.width = window_width
+def preload_modules():
+    for name in PRELOAD_MODULES:
+        importlib.import_module(name)
 
-    # 初始化语言管理器
-    lang_manager = LanguageManager()
+
+async def show_main_screen(page, lang_manager, screen):
+    """构建主界面并开始首次检测，在警告界面点击“继续”后才调用
+
+    主界面的语言切换与关闭回调登记在screen中（update_texts / close）。
+    """
+    from geocache import GeoCache
+    from history import HistoryStore
+    from monitor import Monitor, collect_metrics
+    from render import RenderScheduler
+    from runner import RunController
+    from session import SessionManager
+    from snapshot import load_snapshot, save_snapshot
+    from worker import AsyncWorker
+
+    # 在应用生命周期内共享HTTP连接池，刷新时复用已建立的连接
+    session_manager = SessionManager()
+    # IP地理位置本地缓存
+    geo_cache = GeoCache()
+    # 检测结果历史记录，启动时先将过期数据降采样
+    history = HistoryStore()
+    history.compact()
+    # 合并检测结果带来的界面刷新
+    render = RenderScheduler(page)
+    # 每轮检测的全局截止时间；新的刷新会取消上一轮
+    run_controller = RunController(budget=30.0)
     
     # 创建加载指示器
     ip_loading = ft.ProgressRing(width=20, height=20, visible=False)
@@ -413,7 +61,11 @@ async def main(page: ft.Page):
     network_status = ft.Text("")
     google_region = ft.Text("")
     github_speed = ft.Text("")
+    throughput_info = ft.Text("", visible=False)
+    dual_stack_info = ft.Text("")
     academic_info = ft.Text("", visible=False)
+    # 启动时显示上次结果的提示（结果的时间与正在刷新）
+    snapshot_info = ft.Text("", size=12, color=ft.Colors.GREY_700, visible=False)
     
     # 创建流媒体测试状态显示控件
     netflix_status = ft.Text("", size=14)
@@ -474,6 +126,7 @@ async def main(page: ft.Page):
     # 用于存储IP信息的变量
     ip_data = {}
     show_full_ip = False
+    dual_stack_data = None
 
     # 创建按钮（先声明，后面再设置on_click）
     refresh_btn = ft.ElevatedButton(
@@ -485,6 +138,18 @@ async def main(page: ft.Page):
         )
     )
 
+    # 强制使用新连接（测量首次连接延迟）
+    cold_connections_checkbox = ft.Checkbox(
+        label=lang_manager.get_text("settings.cold_connections"),
+        value=False
+    )
+
+    # 是否在刷新时运行下载测速
+    throughput_checkbox = ft.Checkbox(
+        label=lang_manager.get_text("settings.throughput_test"),
+        value=False
+    )
+
     toggle_ip_btn = ft.ElevatedButton(
         lang_manager.get_text("main.ip_info.toggle"),
         bgcolor="#1565C0",  # BLUE_600
@@ -523,9 +188,34 @@ async def main(page: ft.Page):
     page.banner = copy_banner
 
     def mask_ip(ip):
+        if ':' in ip:
+            parts = ip.split(':')
+            return ':'.join(parts[:2] + ['*', '*'])
         parts = ip.split('.')
         return '.'.join(parts[:2] + ['*', '*'])
 
+    def format_dual_stack(value):
+        if not isinstance(value, dict):
+            return value
+        prefix = lang_manager.get_text('main.network_status.ipv6_prefix')
+        if not value["ipv6"]:
+            return prefix + lang_manager.get_text('main.network_status.ipv6_unavailable')
+        lines = [prefix + format_ip_info(value["ipv6"], value["ipv6_region"] or "-")]
+
+        def fmt(ms):
+            return "-" if ms is None else f"{ms:.1f}"
+
+        comparison = lang_manager.get_text('main.network_status.family_latency').format(
+            v4=fmt(value["v4_ms"]), v6=fmt(value["v6_ms"])
+        )
+        if value["v6_ms"] is None:
+            comparison = lang_manager.get_text('main.network_status.ipv6_unreachable')
+        elif value["v4_ms"] is not None:
+            faster = "IPv6" if value["v6_ms"] < value["v4_ms"] else "IPv4"
+            comparison += lang_manager.get_text('main.network_status.family_faster').format(family=faster)
+        lines.append(comparison)
+        return "\n".join(lines)
+
     def format_ip_info(ip_info, region):
         ip_display = ip_info if show_full_ip else mask_ip(ip_info)
         return f"{ip_display}（{region}）"
@@ -544,13 +234,15 @@ async def main(page: ft.Page):
             foreign = format_ip_info(ip_data['foreign_ip'], ip_data['foreign_region'])
             ip_info.value = f"{lang_manager.get_text('main.ip_info.domestic')}\n{domestic}\n" \
                            f"{lang_manager.get_text('main.ip_info.foreign')}\n{foreign}"
-        page.update()
 
     def toggle_ip_display(e):
         nonlocal show_full_ip
         if ip_data:
             show_full_ip = not show_full_ip
             update_ip_display()
+            if dual_stack_info.value and dual_stack_data:
+                dual_stack_info.value = format_dual_stack(dual_stack_data)
+            page.update()
 
     def copy_ip_to_clipboard(e):
         if "ip" in ip_data:
@@ -565,42 +257,104 @@ async def main(page: ft.Page):
     copy_ip_btn.on_click = copy_ip_to_clipboard
 
     def check_all_network_items_loaded():
-        required_items = [
-            network_status.value,
-            google_region.value,
-            github_speed.value
-        ]
-        return all(required_items) and (academic_info.value or not academic_info.visible)
+        # 以本轮是否已送达为准：保留旧结果刷新时，控件中的旧值不代表已完成
+        required_items = ["network_status", "google_region", "github_speed"]
+        return (all(key in fresh_keys for key in required_items)
+                and ("academic_name" in fresh_keys or not academic_info.visible))
 
     def update_network_status_ui():
-        status_controls = [
-            ft.Row([
-                ft.Text(lang_manager.get_text("main.network_status.title"), size=18, weight=ft.FontWeight.BOLD),
-                network_loading
-            ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN)
-        ]
-        
+        """只在网络状态卡片的子控件发生变化时重建列表，返回是否有变化"""
+        status_controls = [network_status_header]
+
         for control in [network_status, google_region, github_speed]:
             if control.value:
                 status_controls.append(control)
-        
+
+        if dual_stack_info.value:
+            status_controls.append(dual_stack_info)
+
+        if throughput_info.visible:
+            status_controls.append(throughput_info)
+
         if academic_info.visible:
             status_controls.append(academic_info)
-            
-        network_status_container.content = ft.Column(
-            controls=status_controls,
-            spacing=10
+
+        current = network_status_container.content.controls
+        if len(current) == len(status_controls) and all(a is b for a, b in zip(current, status_controls)):
+            return False
+        network_status_container.content.controls = status_controls
+        return True
+
+    # 检测项 -> 显示该结果的控件，用于标记与替换上次运行的旧结果
+    result_controls = {
+        "ip_info": ip_info,
+        "network_status": network_status,
+        "google_region": google_region,
+        "github_speed": github_speed,
+        "dual_stack": dual_stack_info,
+        "throughput": throughput_info,
+        "academic_name": academic_info,
+        "netflix": netflix_status,
+        "youtube": youtube_status
+    }
+    # 仍在显示快照内容、尚未被本次结果替换的检测项，以及快照的时间
+    stale_keys = set()
+    snapshot_ts = None
+    # 本轮运行中已送达结果的检测项
+    fresh_keys = set()
+
+    def format_age(seconds):
+        minutes = max(int(seconds // 60), 1)
+        if minutes < 60:
+            return lang_manager.get_text("main.snapshot.age_minutes").format(n=minutes)
+        if minutes < 24 * 60:
+            return lang_manager.get_text("main.snapshot.age_hours").format(n=minutes // 60)
+        return lang_manager.get_text("main.snapshot.age_days").format(n=minutes // (24 * 60))
+
+    def update_snapshot_info():
+        snapshot_info.value = lang_manager.get_text("main.snapshot.stale").format(
+            age=format_age(time.time() - snapshot_ts)
         )
 
+    async def show_snapshot(snapshot):
+        """立即显示上次完成的检测结果，以灰色标记为旧结果，随后由刷新逐项替换"""
+        nonlocal snapshot_ts
+        for key, value in snapshot["results"].items():
+            await update_single_result(key, value)
+        for key in snapshot["results"]:
+            if key in result_controls:
+                stale_keys.add(key)
+                result_controls[key].color = ft.Colors.GREY_500
+        snapshot_ts = snapshot["ts"]
+        update_snapshot_info()
+        snapshot_info.visible = True
+        render.flush(full=True)
+
+    def clear_stale():
+        """刷新结束后清除未被替换的旧结果（例如本次未运行的检测）"""
+        for key in stale_keys:
+            control = result_controls[key]
+            control.value = ""
+            control.color = None
+            if key in ("throughput", "academic_name"):
+                control.visible = False
+        stale_keys.clear()
+        snapshot_info.visible = False
+        update_network_status_ui()
+
     async def update_single_result(key, value):
-        nonlocal ip_data
+        nonlocal ip_data, dual_stack_data
+        fresh_keys.add(key)
+        if key in stale_keys:
+            stale_keys.discard(key)
+            result_controls[key].color = None
         if key == "ip_info":
             ip_data = value
             update_ip_display()
             ip_loading.visible = False
             toggle_ip_btn.visible = "error" not in ip_data
             copy_ip_btn.visible = "error" not in ip_data
-            page.update()
+            render.mark_dirty(ip_info_container)
         elif key == "network_status":
             network_status.value = f"{lang_manager.get_text('main.network_status.status_prefix')}{value}"
             is_network_free = lang_manager.get_text("main.network_status.status_free") in value
@@ -614,47 +368,64 @@ async def main(page: ft.Page):
                 youtube_status.visible = True
                 netflix_loading.visible = True
                 youtube_loading.visible = True
+                render.mark_dirty(streaming_container)
             elif not is_network_free:
                 streaming_container.visible = False
                 netflix_loading.visible = False
                 youtube_loading.visible = False
-            page.update()
+                render.mark_dirty(streaming_container)
+            render.mark_dirty(network_status)
         elif key == "google_region":
             google_region.value = f"{lang_manager.get_text('main.network_status.google_region_prefix')}{value}"
-            page.update()
+            render.mark_dirty(google_region)
         elif key == "github_speed":
             github_speed.value = f"{lang_manager.get_text('main.network_status.github_speed_prefix')}{value}"
-            page.update()
+            render.mark_dirty(github_speed)
+        elif key == "dual_stack":
+            dual_stack_data = value
+            dual_stack_info.value = format_dual_stack(value)
+            render.mark_dirty(dual_stack_info)
+        elif key == "throughput":
+            throughput_info.visible = True
+            throughput_info.value = f"{lang_manager.get_text('main.network_status.throughput_prefix')}{value}"
+            render.mark_dirty(throughput_info)
         elif key == "academic_name":
             academic_info.visible = bool(value)
             academic_info.value = f"{lang_manager.get_text('main.network_status.academic_prefix')}{value}" if value else ""
-            page.update()
+            render.mark_dirty(academic_info)
         elif key == "netflix":
             netflix_loading.visible = False
             netflix_status.value = value
             netflix_status.visible = True
-            page.update()
+            render.mark_dirty(netflix_status, netflix_loading)
         elif key == "youtube":
             youtube_loading.visible = False
             youtube_status.value = value
             youtube_status.visible = True
-            page.update()
+            render.mark_dirty(youtube_status, youtube_loading)
 
         # 只在所有基本网络检查项目完成时显示一次完成消息
         if check_all_network_items_loaded() and network_loading.visible:
             network_loading.visible = False
-            page.update()
+            render.mark_dirty(network_loading)
         
-        # 更新网络状态UI
-        update_network_status_ui()
-        page.update()
+        # 更新网络状态UI，子控件有变化时才刷新整个卡片
+        if update_network_status_ui():
+            render.mark_dirty(network_status_container)
 
-    async def refresh_data(e):
+    async def refresh_data(e, keep_stale=False):
         # 禁用刷新按钮并显示加载指示器
         refresh_btn.disabled = True
         ip_loading.visible = True
         network_loading.visible = True
+        fresh_keys.clear()
+        if keep_stale:
+            # 保留正在显示的结果（快照或上一轮），由本次结果逐项替换；未被替换的在结束时清除
+            stale_keys.update(key for key, control in result_controls.items() if control.value)
+            return await run_checks()
         streaming_container.visible = False
+        stale_keys.clear()
+        snapshot_info.visible = False
         
         # 隐藏操作按钮
         toggle_ip_btn.visible = False
@@ -665,6 +436,9 @@ async def main(page: ft.Page):
         network_status.value = ""
         google_region.value = ""
         github_speed.value = ""
+        throughput_info.value = ""
+        throughput_info.visible = False
+        dual_stack_info.value = ""
         academic_info.value = ""
         academic_info.visible = False
         
@@ -673,17 +447,238 @@ async def main(page: ft.Page):
         youtube_status.value = ""
         netflix_loading.visible = False
         youtube_loading.visible = False
+        return await run_checks()
+
+    async def run_checks():
         page.update()
 
         # 创建worker并运行检查
-        async with AsyncWorker(lang_manager) as worker:
-            await worker.run_all_checks(update_callback=update_single_result)
+        session_manager.force_cold = bool(cold_connections_checkbox.value)
+        worker = AsyncWorker(lang_manager, session_manager=session_manager,
+                             throughput=bool(throughput_checkbox.value), geo_cache=geo_cache)
+        run_ts = time.time()
+        started = time.perf_counter()
+        render_before = render.stats()
+        # 按送达顺序记录界面收到的结果，完成后保存为下次启动时的快照
+        delivered = {}
 
-        # 隐藏加载指示器并重新启用刷新按钮
-        refresh_btn.disabled = False
-        ip_loading.visible = False
-        network_loading.visible = False
-        page.update()
+        async def deliver(key, value):
+            delivered[key] = value
+            await update_single_result(key, value)
+
+        superseded = False
+        try:
+            results = await run_controller.run(worker, update_callback=deliver)
+            if results is None:
+                # 已被新的刷新取代，界面由新的运行负责
+                superseded = True
+                return None
+            history.record_run(worker, results, run_ts=run_ts, duration=time.perf_counter() - started)
+            if results:
+                save_snapshot(delivered, lang_manager.current_lang, run_ts=run_ts)
+            # 先发出仍在合并窗口中的刷新，使统计包含本轮的全部刷新
+            render.flush()
+            render_after = render.stats()
+            update_diagnostics(worker, {name: render_after[name] - render_before[name] for name in render_after})
+            return worker, results
+        finally:
+            # 正常结束或被取消（如运行中关闭监控）时都要恢复界面，否则刷新按钮与加载指示器会一直保持
+            if not superseded:
+                clear_stale()
+                refresh_btn.disabled = False
+                ip_loading.visible = False
+                network_loading.visible = False
+                render.flush(full=True)
+
+    # 持续监控：自适应间隔重复检测，并绘制延迟与可用性迷你图
+    monitor_points = 60
+    monitor = None
+
+    latency_chart = ft.LineChart(
+        data_series=[ft.LineChartData(data_points=[], stroke_width=2, color="#1565C0")],
+        min_x=0,
+        max_x=monitor_points - 1,
+        min_y=0,
+        interactive=False,
+        left_axis=ft.ChartAxis(show_labels=False, labels_size=0),
+        bottom_axis=ft.ChartAxis(show_labels=False, labels_size=0),
+        height=60,
+        expand=True
+    )
+    # 可用性条带：固定数量的色块，只修改颜色
+    availability_cells = [
+        ft.Container(width=4, height=16, border_radius=1, bgcolor=ft.Colors.GREY_300)
+        for _ in range(monitor_points)
+    ]
+    monitor_latency_label = ft.Text(lang_manager.get_text("main.monitor.latency"), size=12)
+    monitor_availability_label = ft.Text(lang_manager.get_text("main.monitor.availability"), size=12)
+    monitor_next_run = ft.Text("", size=12, color=ft.Colors.GREY_700)
+    monitor_container = ft.Container(
+        content=ft.Column(
+            controls=[
+                ft.Text(
+                    lang_manager.get_text("main.monitor.title"),
+                    size=18,
+                    weight=ft.FontWeight.BOLD
+                ),
+                monitor_latency_label,
+                latency_chart,
+                monitor_availability_label,
+                ft.Row(availability_cells, spacing=2),
+                monitor_next_run
+            ],
+            spacing=10
+        ),
+        padding=15,
+        visible=False
+    )
+
+    async def monitor_run_once():
+        # 定时检测保留当前结果逐项替换，避免界面每轮先清空再闪烁
+        outcome = await refresh_data(None, keep_stale=True)
+        return collect_metrics(*outcome) if outcome else None
+
+    async def update_monitor_ui(metrics):
+        latency = monitor.history["github_latency_ms"].values()[-monitor_points:]
+        offset = monitor_points - len(latency)
+        latency_chart.data_series[0].data_points = [
+            ft.LineChartDataPoint(offset + i, value)
+            for i, value in enumerate(latency) if value == value  # 跳过NaN
+        ]
+        available = monitor.history["github_available"].values()[-monitor_points:]
+        network = monitor.history["network_free"].values()[-monitor_points:]
+        offset = monitor_points - len(available)
+        for i, cell in enumerate(availability_cells):
+            if i < offset:
+                cell.bgcolor = ft.Colors.GREY_300
+            elif available[i - offset] and network[i - offset]:
+                cell.bgcolor = ft.Colors.GREEN_400
+            elif available[i - offset] or network[i - offset]:
+                cell.bgcolor = ft.Colors.AMBER_400
+            else:
+                cell.bgcolor = ft.Colors.RED_400
+        monitor_next_run.value = lang_manager.get_text("main.monitor.next_run").format(seconds=round(monitor.interval))
+        render.mark_dirty(monitor_container)
+
+    monitor = Monitor(monitor_run_once)
+
+    async def toggle_monitoring(e):
+        if monitor_switch.value:
+            monitor_container.visible = True
+            page.update()
+            monitor.start(on_sample=update_monitor_ui)
+        else:
+            await monitor.stop()
+            monitor_container.visible = False
+            page.update()
+
+    monitor_switch = ft.Switch(
+        label=lang_manager.get_text("main.monitor.toggle"),
+        value=False,
+        on_change=toggle_monitoring
+    )
+
+    # 诊断：最近一轮检测的瀑布图、关键路径与追踪导出
+    waterfall_width = 180
+    diagnostics_worker = None
+    # 最近一轮运行期间渲染调度器实际发送与合并的刷新次数
+    diagnostics_render = {"sent": 0, "coalesced": 0}
+    diagnostics_critical_path = ft.Text("", size=12, visible=False)
+    diagnostics_waterfall = ft.Column(spacing=4)
+    diagnostics_summary = ft.Text(lang_manager.get_text("main.diagnostics.empty"), size=12, color=ft.Colors.GREY_700)
+
+    def span_color(span, critical):
+        if span["outcome"] == "ok":
+            return ft.Colors.GREEN_700 if critical else ft.Colors.GREEN_300
+        if span["outcome"] == "timeout":
+            return ft.Colors.AMBER_400
+        return ft.Colors.RED_400
+
+    def update_diagnostics(worker, render_stats=None):
+        nonlocal diagnostics_worker, diagnostics_render
+        tracer = worker.tracer
+        if tracer is None:
+            return
+        diagnostics_worker = worker
+        diagnostics_render = render_stats or diagnostics_render
+        schedule = worker.last_schedule
+        checks = tracer.by_category("check")
+        total = max((span["end"] or 0.0 for span in tracer.spans), default=0.0) or 1.0
+        critical = ["ip_info"] + (schedule.critical_path if schedule else [])
+        rows = []
+        for span in checks:
+            end = span["end"] if span["end"] is not None else total
+            bar = ft.Container(
+                width=max(waterfall_width * (end - span["start"]) / total, 2),
+                height=10,
+                border_radius=2,
+                bgcolor=span_color(span, span["name"] in critical),
+                margin=ft.margin.only(left=waterfall_width * span["start"] / total)
+            )
+            rows.append(ft.Row([
+                ft.Text(span["name"], size=12, width=110),
+                ft.Container(content=bar, width=waterfall_width, alignment=ft.alignment.center_left),
+                ft.Text(f"{(end - span['start']) * 1000:.0f} ms", size=12)
+            ], spacing=6))
+        diagnostics_waterfall.controls = rows
+
+        ip_span = next((span for span in checks if span["name"] == "ip_info"), None)
+        critical_ms = (schedule.critical_path_time if schedule else 0.0)
+        if ip_span and ip_span["end"] is not None:
+            critical_ms += ip_span["end"] - ip_span["start"]
+        diagnostics_critical_path.value = lang_manager.get_text("main.diagnostics.critical_path").format(
+            path=" → ".join(critical), ms=f"{critical_ms * 1000:.0f}"
+        )
+        diagnostics_critical_path.visible = True
+        updates = tracer.by_category("ui")
+        diagnostics_summary.value = lang_manager.get_text("main.diagnostics.summary").format(
+            requests=len(tracer.by_category("request")),
+            retries=sum(1 for span in tracer.by_category("attempt") if span["outcome"] == "retry"),
+            hedges=sum(1 for span in tracer.by_category("attempt") if span["args"].get("hedged")),
+            updates=len(updates),
+            sent=diagnostics_render["sent"],
+            coalesced=diagnostics_render["coalesced"],
+            ui_ms=f"{sum((span['end'] or span['start']) - span['start'] for span in updates) * 1000:.1f}"
+        )
+        if worker.scan_reports:
+            reports = worker.scan_reports.values()
+            diagnostics_summary.value += "\n" + lang_manager.get_text("main.diagnostics.scan").format(
+                read=f"{sum(report['bytes_read'] for report in reports) / 1024:.0f}",
+                saved=f"{sum(report['bytes_saved'] or 0 for report in reports) / 1024:.0f}"
+            )
+        if worker.geo_cache:
+            diagnostics_summary.value += "\n" + lang_manager.get_text("main.diagnostics.geo_cache").format(
+                **worker.geo_cache.stats())
+        export_trace_btn.disabled = False
+
+    def export_trace(e):
+        if diagnostics_worker is None:
+            return
+        path = data_path(os.path.join("traces", f"trace-{time.strftime('%Y%m%d-%H%M%S')}.json"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        diagnostics_worker.tracer.export(path)
+        page.open(ft.SnackBar(ft.Text(lang_manager.get_text("main.diagnostics.exported").format(path=path))))
+
+    export_trace_btn = ft.TextButton(
+        lang_manager.get_text("main.diagnostics.export"),
+        icon=ft.Icons.DOWNLOAD,
+        disabled=True,
+        on_click=export_trace
+    )
+
+    diagnostics_tile = ft.ExpansionTile(
+        title=ft.Text(lang_manager.get_text("main.diagnostics.title"), size=18, weight=ft.FontWeight.BOLD),
+        initially_expanded=False,
+        controls=[
+            ft.Container(
+                content=ft.Column(
+                    [diagnostics_critical_path, diagnostics_waterfall, diagnostics_summary, export_trace_btn],
+                    spacing=8
+                ),
+                padding=ft.padding.only(left=15, right=15, bottom=15)
+            )
+        ]
+    )
 
     # 设置刷新按钮的on_click事件
     refresh_btn.on_click = refresh_data
@@ -709,20 +704,23 @@ async def main(page: ft.Page):
     )
     
     # 创建网络状态容器
+    network_status_header = ft.Row([
+        ft.Text(
+            lang_manager.get_text("main.network_status.title"),
+            size=18,
+            weight=ft.FontWeight.BOLD
+        ),
+        network_loading
+    ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN)
     network_status_container = ft.Container(
         content=ft.Column(
             controls=[
-                ft.Row([
-                    ft.Text(
-                        lang_manager.get_text("main.network_status.title"),
-                        size=18,
-                        weight=ft.FontWeight.BOLD
-                    ),
-                    network_loading
-                ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
+                network_status_header,
                 network_status,
                 google_region,
                 github_speed,
+                dual_stack_info,
+                throughput_info,
                 academic_info
             ],
             spacing=10
@@ -734,6 +732,8 @@ async def main(page: ft.Page):
     content_area = ft.Container(
         content=ft.Column(
             controls=[
+                snapshot_info,
+
                 # IP信息卡片
                 ft.Card(
                     content=ip_info_container
@@ -748,12 +748,29 @@ async def main(page: ft.Page):
                 ft.Card(
                     content=streaming_container
                 ),
+
+                # 持续监控卡片
+                ft.Card(
+                    content=monitor_container
+                ),
+
+                # 诊断卡片（可折叠）
+                ft.Card(
+                    content=diagnostics_tile
+                ),
                 
                 # 刷新按钮
                 ft.Container(
                     content=refresh_btn,
                     alignment=ft.alignment.center,
                     padding=ft.padding.only(top=20)
+                ),
+                ft.Container(
+                    content=ft.Column(
+                        [cold_connections_checkbox, throughput_checkbox, monitor_switch],
+                        spacing=0
+                    ),
+                    alignment=ft.alignment.center
                 )
             ],
             spacing=20
@@ -761,14 +778,122 @@ async def main(page: ft.Page):
         padding=20
     )
 
+    # 主界面的文本随语言切换更新，由main中的change_language调用
+    def update_texts():
+        copy_banner.content.value = lang_manager.get_text("copy.success")
+        copy_banner.actions[0].text = lang_manager.get_text("buttons.ok")
+
+        # 更新按钮文本
+        refresh_btn.text = lang_manager.get_text("buttons.refresh")
+        toggle_ip_btn.text = lang_manager.get_text("main.ip_info.toggle")
+        copy_ip_btn.text = lang_manager.get_text("main.ip_info.copy")
+        cold_connections_checkbox.label = lang_manager.get_text("settings.cold_connections")
+        throughput_checkbox.label = lang_manager.get_text("settings.throughput_test")
+
+        # 更新主界面的标题
+        ip_info_container.content.controls[0].controls[0].value = lang_manager.get_text("main.ip_info.title")
+        network_status_container.content.controls[0].controls[0].value = lang_manager.get_text("main.network_status.title")
+        streaming_container.content.controls[0].value = lang_manager.get_text("main.streaming.title")
+        monitor_container.content.controls[0].value = lang_manager.get_text("main.monitor.title")
+        monitor_latency_label.value = lang_manager.get_text("main.monitor.latency")
+        monitor_availability_label.value = lang_manager.get_text("main.monitor.availability")
+        monitor_switch.label = lang_manager.get_text("main.monitor.toggle")
+        diagnostics_tile.title.value = lang_manager.get_text("main.diagnostics.title")
+        export_trace_btn.text = lang_manager.get_text("main.diagnostics.export")
+        if snapshot_info.visible:
+            update_snapshot_info()
+        if diagnostics_worker:
+            update_diagnostics(diagnostics_worker)
+        else:
+            diagnostics_summary.value = lang_manager.get_text("main.diagnostics.empty")
+
+    async def close():
+        if monitor:
+            await monitor.stop()
+        await run_controller.cancel()
+        await session_manager.close()
+        geo_cache.close()
+        history.close()
+
+    screen["update_texts"] = update_texts
+    screen["close"] = close
+
+    page.clean()
+    # 更新页面标题
+    page.title = lang_manager.get_text("app.title")
+    page.add(
+        ft.SafeArea(
+            ft.Column(
+                controls=[
+                    copy_banner,
+                    ft.Container(
+                        content=ft.Text(
+                            lang_manager.get_text("app.title"),
+                            size=24,
+                            weight=ft.FontWeight.BOLD,
+                            color="white"
+                        ),
+                        bgcolor="#1565C0",
+                        padding=15,
+                        width=float("inf"),
+                        alignment=ft.alignment.center
+                    ),
+                    ft.Container(
+                        content=ft.Column(
+                            controls=[content_area],
+                            scroll=ft.ScrollMode.AUTO,
+                            expand=True
+                        ),
+                        alignment=ft.alignment.top_center,
+                        expand=True
+                    )
+                ],
+                spacing=0,
+                expand=True
+            ),
+            expand=True
+        )
+    )
+
+    page.update()
+
+    # 先显示上次的结果（语言相同时），再在后台刷新
+    snapshot = load_snapshot()
+    if snapshot and snapshot.get("lang") == lang_manager.current_lang:
+        await show_snapshot(snapshot)
+        await refresh_data(None, keep_stale=True)
+    else:
+        await refresh_data(None)
+
+
+async def main(page: ft.Page):
+    page.title = ""
+    page.window.height = 800
+    page.theme_mode = ft.ThemeMode.LIGHT
+    page.padding = 0
+
+    # 计算窗口宽度
+    content_width = 400  # 内容区域最大宽度
+    window_width = content_width + 40  # 加上内容区域的左右padding (20 * 2)
+    page.window.width = window_width
+
+    # 初始化语言管理器
+    lang_manager = LanguageManager()
+    # 主界面的回调，点击“继续”后由show_main_screen登记
+    screen = {}
+
+    async def handle_page_close(e):
+        if "close" in screen:
+            await screen["close"]()
+
+    page.on_close = handle_page_close
+
     # 语言切换函数
     def change_language(new_lang):
         if lang_manager.set_language(new_lang):
             # 更新所有文本
             page.title = lang_manager.get_text("app.title")
-            copy_banner.content.value = lang_manager.get_text("copy.success")
-            copy_banner.actions[0].text = lang_manager.get_text("buttons.ok")
-            
+
             # 更新警告页面的文本
             warning_screen.controls[0].content.value = lang_manager.get_text("app.title")
             warning_content = warning_screen.controls[1].content.controls
@@ -776,7 +901,7 @@ async def main(page: ft.Page):
             warning_content[2].value = (
                 lang_manager.get_text("warning.message") + "\n\n" +
                 lang_manager.get_text("warning.restricted_countries_prefix") + "\n" +
-                "\n".join([f"• {lang_manager.get_text(f'countries.{code}')}" for code in AsyncWorker.RESTRICTED_COUNTRY_CODES]) + "\n\n" +
+                "\n".join([f"• {lang_manager.get_text(f'countries.{code}')}" for code in RESTRICTED_COUNTRY_CODES]) + "\n\n" +
                 lang_manager.get_text("warning.agreement")
             )
             warning_content[3].content.content.value = lang_manager.get_text("warning.disclaimer")
@@ -784,68 +909,17 @@ async def main(page: ft.Page):
             warning_content[5].controls[0].text = lang_manager.get_text("warning.continue")
             warning_content[5].controls[1].text = lang_manager.get_text("warning.cancel")
             
-            # 更新按钮文本
-            refresh_btn.text = lang_manager.get_text("buttons.refresh")
-            toggle_ip_btn.text = lang_manager.get_text("main.ip_info.toggle")
-            copy_ip_btn.text = lang_manager.get_text("main.ip_info.copy")
-
-            # 更新主界面的标题
-            if ip_info_container:
-                ip_info_container.content.controls[0].controls[0].value = lang_manager.get_text("main.ip_info.title")
-            if network_status_container:
-                network_status_container.content.controls[0].controls[0].value = lang_manager.get_text("main.network_status.title")
-            if streaming_container:
-                streaming_container.content.controls[0].value = lang_manager.get_text("main.streaming.title")
-            
+            # 主界面已显示时同时更新主界面
+            if "update_texts" in screen:
+                screen["update_texts"]()
+
             # 更新页面
             page.update()
 
     # 创建警告界面
     async def handle_warning_action(e):
         if e.control.data:  # 如果用户点击"继续"
-            page.clean()
-            # 更新页面标题
-            page.title = lang_manager.get_text("app.title")
-            page.add(
-                ft.SafeArea(
-                    ft.Column(
-                        controls=[
-                            copy_banner,
-                            ft.Container(
-                                content=ft.Text(
-                                    lang_manager.get_text("app.title"),
-                                    size=24,
-                                    weight=ft.FontWeight.BOLD,
-                                    color="white"
-                                ),
-                                bgcolor="#1565C0",
-                                padding=15,
-                                width=float("inf"),
-                                alignment=ft.alignment.center
-                            ),
-                            ft.Container(
-                                content=ft.Column(
-                                    controls=[content_area],
-                                    scroll=ft.ScrollMode.AUTO,
-                                    expand=True
-                                ),
-                                alignment=ft.alignment.top_center,
-                                expand=True
-                            )
-                        ],
-                        spacing=0,
-                        expand=True
-                    ),
-                    expand=True
-                )
-            )
-
-            # 更新主界面的标题文本
-            ip_info_container.content.controls[0].controls[0].value = lang_manager.get_text("main.ip_info.title")
-            network_status_container.content.controls[0].controls[0].value = lang_manager.get_text("main.network_status.title")
-            page.update()
-
-            await refresh_data(None)
+            await show_main_screen(page, lang_manager, screen)
         else:  # 如果用户点击"取消"
             page.window.close()
         page.update()
@@ -881,7 +955,7 @@ async def main(page: ft.Page):
                         ft.Text(
                             lang_manager.get_text("warning.message") + "\n\n" +
                             lang_manager.get_text("warning.restricted_countries_prefix") + "\n" +
-                            "\n".join([f"• {lang_manager.get_text(f'countries.{code}')}" for code in AsyncWorker.RESTRICTED_COUNTRY_CODES]) + "\n\n" +
+                            "\n".join([f"• {lang_manager.get_text(f'countries.{code}')}" for code in RESTRICTED_COUNTRY_CODES]) + "\n\n" +
                             lang_manager.get_text("warning.agreement"),
                             text_align=ft.TextAlign.CENTER,
                             size=16
@@ -961,5 +1035,11 @@ async def main(page: ft.Page):
         )
     )
     page.update()
+    startup_timings["first_frame_ms"] = (time.perf_counter() - _started) * 1000
+
+    # 用户阅读警告时在后台导入检测模块，点击“继续”后无需再等待导入
+    await asyncio.to_thread(preload_modules)
+
 
-ft.app(target=main, view=ft.AppView.FLET_APP) 
\ No newline at end of file
+if __name__ == "__main__":
+    ft.app(target=main, view=ft.AppView.FLET_APP)
@@ -0,0 +1,297 @@
+"""检测结果的Prometheus/OpenMetrics导出
+
+指标在每轮检测结束时从worker已有的记录（机器可读状态、追踪区间、延迟报告）一次性更新，
+抓取时只按当前值生成文本，不在检测过程中增加任何开销。HTTP服务模式在 /metrics 提供，
+命令行模式可用 --metrics-file 写入node_exporter的textfile collector目录。
+"""
+import math
+import os
+import time
+from bisect import bisect_left
+from urllib.parse import urlsplit
+
+from history import result_rows
+
+# 单个请求耗时的桶边界（秒）
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# 一轮检测总耗时的桶边界（秒）
+RUN_BUCKETS = (1.0, 2.5, 5.0, 10.0, 15.0, 20.0, 30.0, 45.0, 60.0, 90.0, 120.0)
+
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _escape_help(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _number(value):
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    if value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Metric:
+    """指标族：按标签值元组保存当前值"""
+    type = None
+    # 样本名相对指标族名的后缀（OpenMetrics中counter为_total，info为_info）
+    suffix = ""
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def clear(self):
+        self.values.clear()
+
+    def samples(self):
+        """返回 (样本名后缀, 标签对, 数值) 列表"""
+        return [(self.suffix, list(zip(self.labelnames, key)), value) for key, value in self.values.items()]
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def set(self, value, **labels):
+        self.values[self._key(labels)] = float(value)
+
+
+class Counter(Metric):
+    type = "counter"
+    suffix = "_total"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0.0) + amount
+
+    def set(self, value, **labels):
+        """直接设置累计值，用于来源本身已是累计计数的情况"""
+        self.values[self._key(labels)] = float(value)
+
+
+class Info(Metric):
+    """只有标签有意义、值恒为1的指标，如区域"""
+    type = "info"
+    suffix = "_info"
+
+    def set(self, **labels):
+        self.values[self._key(labels)] = 1.0
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        state = self.values.get(key)
+        if state is None:
+            # 各桶（非累计）计数、总和、总数
+            state = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        state[0][bisect_left(self.buckets, value)] += 1
+        state[1] += value
+        state[2] += 1
+
+    def samples(self):
+        samples = []
+        for key, (counts, total, count) in self.values.items():
+            pairs = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                le = "+Inf" if math.isinf(bound) else repr(float(bound))
+                samples.append(("_bucket", pairs + [("le", le)], float(cumulative)))
+            samples.append(("_count", pairs, float(count)))
+            samples.append(("_sum", pairs, total))
+        return samples
+
+
+class MetricsRegistry:
+    """指标注册表，可渲染为OpenMetrics文本或Prometheus文本格式（0.0.4）"""
+
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def gauge(self, name, help, labelnames=()):
+        return self.register(Gauge(name, help, labelnames))
+
+    def counter(self, name, help, labelnames=()):
+        return self.register(Counter(name, help, labelnames))
+
+    def info(self, name, help, labelnames=()):
+        return self.register(Info(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def render(self, openmetrics=True):
+        """生成文本；Prometheus格式中counter与info的TYPE行使用带后缀的名称，info按gauge导出"""
+        lines = []
+        for metric in self.metrics:
+            if openmetrics:
+                family, metric_type = metric.name, metric.type
+            else:
+                family = metric.name + metric.suffix
+                metric_type = "gauge" if metric.type == "info" else metric.type
+            lines.append(f"# HELP {family} {_escape_help(metric.help)}")
+            lines.append(f"# TYPE {family} {metric_type}")
+            for suffix, pairs, value in metric.samples():
+                lines.append(f"{metric.name}{suffix}{_labels(pairs)} {_number(value)}")
+        if openmetrics:
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path):
+        """以Prometheus文本格式写入文件（供textfile collector读取），先写临时文件再替换"""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render(openmetrics=False))
+        os.replace(tmp_path, path)
+        return path
+
+
+def negotiate(accept):
+    """按Accept请求头选择格式，返回 (是否OpenMetrics, Content-Type)"""
+    if "application/openmetrics-text" in (accept or ""):
+        return True, OPENMETRICS_CONTENT_TYPE
+    return False, PROMETHEUS_CONTENT_TYPE
+
+
+class CheckMetrics:
+    """检测结果指标
+
+    每轮检测的结果类指标（状态、区域、耗时）在record_run时整体替换，未运行的检测不再导出；
+    直方图与计数器跨轮累计。
+    """
+
+    def __init__(self, registry=None):
+        self.registry = registry or MetricsRegistry()
+        r = self.registry
+        self.runs = r.counter("iptest_runs", "Completed check runs", ["outcome"])
+        self.run_duration = r.histogram("iptest_run_duration_seconds", "Wall time of a check run", buckets=RUN_BUCKETS)
+        self.last_run = r.gauge("iptest_last_run_timestamp_seconds", "Unix time of the last completed check run")
+        self.success = r.gauge("iptest_check_success", "Whether the check succeeded in the last run", ["check"])
+        self.status = r.info("iptest_check_status", "Machine-readable status of each check in the last run",
+                             ["check", "status"])
+        self.duration = r.gauge("iptest_check_duration_seconds", "Wall time of each check in the last run", ["check"])
+        self.requests = r.histogram("iptest_request_duration_seconds", "Duration of successful HTTP requests",
+                                    ["host"])
+        self.request_failures = r.counter("iptest_request_failures", "HTTP requests that failed or timed out",
+                                          ["host", "outcome"])
+        self.network_free = r.gauge("iptest_network_free", "Network-freedom verdict of the last run")
+        self.probes = r.gauge("iptest_network_probes",
+                              "Network-freedom probe outcomes, exported once every probe has finished", ["result"])
+        self.github_latency = r.histogram("iptest_github_latency_seconds",
+                                          "Total time of each GitHub raw content latency sample", ["connection"])
+        self.github_phase = r.gauge("iptest_github_phase_seconds",
+                                    "Connection phase timings of the last GitHub latency test", ["phase"])
+        self.google_region = r.info("iptest_google_region", "Google prefdomain region", ["region"])
+        self.streaming = r.gauge("iptest_streaming_available", "Whether the streaming service is available",
+                                 ["service"])
+        self.streaming_region = r.info("iptest_streaming_region", "Region reported by the streaming service",
+                                       ["service", "region"])
+        self.throughput = r.gauge("iptest_throughput_bytes_per_second", "Average download throughput")
+        self.geo_lookups = r.counter("iptest_geo_cache_lookups", "IP geolocation cache lookups", ["result"])
+        self.geo_entries = r.gauge("iptest_geo_cache_entries", "Entries in the IP geolocation cache")
+        # 每轮整体替换的指标
+        self._per_run = [self.success, self.status, self.duration, self.network_free, self.probes, self.github_phase,
+                         self.google_region, self.streaming, self.streaming_region, self.throughput]
+
+    def record_failure(self):
+        self.runs.inc(outcome="error")
+
+    def record_run(self, worker, results, duration=None, run_ts=None):
+        for metric in self._per_run:
+            metric.clear()
+        self.runs.inc(outcome="ok")
+        if duration is not None:
+            self.run_duration.observe(duration)
+        self.last_run.set(run_ts or time.time())
+
+        for _, key, status, ok, _, _ in result_rows(worker, results, None):
+            self.success.set(ok, check=key)
+            self.status.set(check=key, status=status)
+
+        for item in worker.tracer.spans if worker.tracer else []:
+            if item["end"] is None:
+                continue
+            if item["category"] == "check":
+                self.duration.set(item["end"] - item["start"], check=item["name"])
+            elif item["category"] == "request":
+                host = urlsplit(item["args"].get("url", "")).hostname or item["name"]
+                if item["outcome"] == "ok":
+                    self.requests.observe(item["end"] - item["start"], host=host)
+                elif item["outcome"] != "cancelled":
+                    # 被取消的是对冲落败或提前结束的请求，不计为失败
+                    self.request_failures.inc(host=host, outcome=item["outcome"])
+
+        probe = worker.network_probe
+        if probe and "network_status" in results:
+            self.network_free.set(probe["passed"])
+            # 提前判定时的计数不代表实际结果，只导出全部探测完成后的计数
+            if probe["complete"]:
+                self.probes.set(probe["success"], result="success")
+                self.probes.set(probe["failure"], result="failure")
+
+        report = worker.latency_reports.get("github_speed") if "github_speed" in results else None
+        if report:
+            for sample in report["samples"]:
+                self.github_latency.observe(sample["total_ms"] / 1000, connection="cold" if sample["cold"] else "warm")
+            for phase in ("dns", "tcp_connect", "tls_handshake", "ttfb"):
+                if report.get(f"{phase}_ms") is not None:
+                    self.github_phase.set(report[f"{phase}_ms"] / 1000, phase=phase)
+
+        google = worker.check_status.get("google_region", {})
+        if "google_region" in results and google.get("region"):
+            self.google_region.set(region=google["region"])
+
+        for service in ("netflix", "youtube"):
+            detail = worker.check_status.get(service)
+            if service not in results or detail is None:
+                continue
+            self.streaming.set(detail["status"] == "available", service=service)
+            if detail.get("region"):
+                self.streaming_region.set(service=service, region=detail["region"])
+
+        if worker.geo_cache:
+            # 缓存的命中/未命中计数在进程内累计，与计数器语义一致
+            stats = worker.geo_cache.stats()
+            self.geo_lookups.set(stats["hits"], result="hit")
+            self.geo_lookups.set(stats["misses"], result="miss")
+            self.geo_entries.set(stats["size"])
+
+        throughput = worker.check_status.get("throughput", {})
+        if "throughput" in results and throughput.get("bps") is not None:
+            self.throughput.set(throughput["bps"])
+
+    def render(self, openmetrics=True):
+        return self.registry.render(openmetrics)
+
+    def write_textfile(self, path):
+        return self.registry.write_textfile(path)
@@ -0,0 +1,122 @@
+import asyncio
+import math
+from array import array
+
+
+class RingBuffer:
+    """定长环形缓冲区（基于array），写满后覆盖最旧的数据，内存占用恒定"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._data = array('d', [math.nan] * capacity)
+        self._next = 0
+        self._size = 0
+
+    def append(self, value):
+        self._data[self._next] = math.nan if value is None else float(value)
+        self._next = (self._next + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def values(self):
+        """按从旧到新的顺序返回数据"""
+        start = (self._next - self._size) % self.capacity
+        return [self._data[(start + i) % self.capacity] for i in range(self._size)]
+
+    def last(self):
+        if not self._size:
+            return None
+        return self._data[(self._next - 1) % self.capacity]
+
+    def __len__(self):
+        return self._size
+
+
+def collect_metrics(worker, results):
+    """从一轮检测中提取数值指标：延迟为毫秒，可用性为0/1"""
+    github = worker.latency_reports.get("github_speed")
+    probe = worker.network_probe or {}
+    return {
+        "github_latency_ms": github["cold_total_ms"] if github else None,
+        "github_available": 1.0 if github else 0.0,
+        "network_free": 1.0 if worker.network_free else 0.0,
+        # 只有全部探测完成时成功数才是实际结果
+        "network_free_ratio": probe["success"] / probe["total"] if probe.get("complete") and probe["total"] else None,
+        "ip_available": 0.0 if "error" in results.get("ip_info", {"error": True}) else 1.0
+    }
+
+
+class Monitor:
+    """持续监控：定期运行检测，结果变化后加快频率，稳定时逐渐放慢"""
+
+    def __init__(self, run_once, min_interval=15.0, max_interval=300.0, backoff=1.5,
+                 capacity=120, latency_change=0.5):
+        # run_once() 运行一轮检测并返回指标字典
+        self.run_once = run_once
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.capacity = capacity
+        # 延迟相对变化超过该比例视为状态变化
+        self.latency_change = latency_change
+        self.interval = min_interval
+        self.history = {}
+        self._task = None
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def _changed(self, metrics):
+        for name, value in metrics.items():
+            buffer = self.history.get(name)
+            previous = buffer.last() if buffer else None
+            if previous is None:
+                continue
+            value = math.nan if value is None else value
+            if math.isnan(value) or math.isnan(previous):
+                if math.isnan(value) != math.isnan(previous):
+                    return True
+                continue
+            if name.endswith("_ms"):
+                if abs(value - previous) > max(previous, 1.0) * self.latency_change:
+                    return True
+            elif value != previous:
+                return True
+        return False
+
+    def record(self, metrics):
+        """写入一轮指标并按是否变化调整下一次间隔"""
+        changed = self._changed(metrics)
+        for name, value in metrics.items():
+            if name not in self.history:
+                self.history[name] = RingBuffer(self.capacity)
+            self.history[name].append(value)
+        if changed:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * self.backoff, self.max_interval)
+        return changed
+
+    async def _loop(self, on_sample):
+        while True:
+            try:
+                metrics = await self.run_once()
+            except Exception as e:
+                print(f"Error in monitor: {e}")
+                metrics = None
+            if metrics is not None:
+                self.record(metrics)
+                if on_sample:
+                    await on_sample(metrics)
+            await asyncio.sleep(self.interval)
+
+    def start(self, on_sample=None):
+        if not self.running:
+            self.interval = self.min_interval
+            self._task = asyncio.create_task(self._loop(on_sample))
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task and not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
@@ -0,0 +1,67 @@
+import asyncio
+
+
+async def quorum_probe(check, targets, concurrency=None, background=False):
+    """并发探测所有目标，一旦多数结果已确定即提前返回
+
+    check(target) 返回真值表示探测成功，抛出的异常一律视为失败。
+    判定规则与原先顺序探测一致：成功数 >= len(targets) / 2 即为通过。
+    返回 {"success", "failure", "total", "passed", "complete", "task"}：提前返回时success/failure只是
+    判定时的计数。background为False时取消剩余探测；为True时剩余探测在后台继续，task为等待它们的任务，
+    完成后同一字典中的计数更新为全部探测的实际结果，complete变为True（判定结果不会因此改变）。
+    """
+    total = len(targets)
+    quorum = total / 2
+    semaphore = asyncio.Semaphore(concurrency or total or 1)
+
+    async def run(target):
+        async with semaphore:
+            try:
+                return bool(await check(target))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                return False
+
+    tasks = [asyncio.create_task(run(target)) for target in targets]
+    result = {"success": 0, "failure": 0, "total": total, "passed": False, "complete": False, "task": None}
+
+    def count(success):
+        result["success" if success else "failure"] += 1
+
+    async def settle(remaining):
+        try:
+            for next_done in asyncio.as_completed(remaining):
+                count(await next_done)
+            result["complete"] = True
+        finally:
+            for task in remaining:
+                task.cancel()
+            await asyncio.gather(*remaining, return_exceptions=True)
+
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            count(await next_done)
+            # 已达到多数，或剩余探测全部成功也无法达到多数时，结果已确定
+            if result["success"] >= quorum or total - result["failure"] < quorum:
+                break
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+    result["passed"] = result["success"] >= quorum
+    remaining = [task for task in tasks if not task.done()]
+    # as_completed可能已在内部取得结果但尚未交给我们，这里以任务状态为准重新计数
+    result["success"] = sum(1 for task in tasks if task.done() and task.result())
+    result["failure"] = sum(1 for task in tasks if task.done() and not task.result())
+    if not remaining:
+        result["complete"] = True
+    elif background:
+        result["task"] = asyncio.create_task(settle(remaining))
+    else:
+        for task in remaining:
+            task.cancel()
+        await asyncio.gather(*remaining, return_exceptions=True)
+    return result
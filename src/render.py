@@ -0,0 +1,47 @@
+import asyncio
+
+
+class RenderScheduler:
+    """合并短时间内的多次界面刷新：控件先标记为待刷新，每个时间窗口只发送一次update"""
+
+    def __init__(self, page, interval=1 / 30):
+        self.page = page
+        # 合并窗口（秒）
+        self.interval = interval
+        self.updates_sent = 0
+        self.updates_coalesced = 0
+        self._dirty = {}
+        self._full = False
+        self._handle = None
+
+    def mark_dirty(self, *controls):
+        """标记控件需要刷新，不传控件时刷新整个页面；需在事件循环线程中调用"""
+        if controls:
+            for control in controls:
+                self._dirty[id(control)] = control
+        else:
+            self._full = True
+        if self._handle is None:
+            self._handle = asyncio.get_running_loop().call_later(self.interval, self.flush)
+        else:
+            self.updates_coalesced += 1
+
+    def flush(self, full=False):
+        """立即发送所有待刷新的控件"""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        full = full or self._full
+        controls = list(self._dirty.values())
+        self._dirty.clear()
+        self._full = False
+        if full:
+            self.page.update()
+        elif controls:
+            self.page.update(*controls)
+        else:
+            return
+        self.updates_sent += 1
+
+    def stats(self):
+        return {"sent": self.updates_sent, "coalesced": self.updates_coalesced}
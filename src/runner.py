@@ -0,0 +1,50 @@
+import asyncio
+import time
+
+
+class RunController:
+    """协调检测运行：同一时间只保留最新一轮，并为每轮设置全局截止时间"""
+
+    def __init__(self, budget=30.0):
+        # 每轮检测的总时间预算（秒），为None时不限制
+        self.budget = budget
+        self.run_id = 0
+        self._task = None
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    async def cancel(self):
+        """取消仍在进行的运行，worker退出时会关闭其连接"""
+        task, self._task = self._task, None
+        if task and not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def run(self, worker, update_callback=None):
+        """启动新一轮检测并取消上一轮；本轮被新的运行取代时返回None"""
+        await self.cancel()
+        self.run_id += 1
+        run_id = self.run_id
+        deadline = time.perf_counter() + self.budget if self.budget else None
+
+        async def guarded_callback(key, value):
+            # 丢弃已被取代的运行产生的结果
+            if update_callback and run_id == self.run_id:
+                await update_callback(key, value)
+
+        async def execute():
+            async with worker:
+                return await worker.run_all_checks(update_callback=guarded_callback, deadline=deadline)
+
+        task = self._task = asyncio.create_task(execute())
+        try:
+            return await task
+        except asyncio.CancelledError:
+            if self._task is not task:
+                return None
+            raise
+        finally:
+            if self._task is task:
+                self._task = None
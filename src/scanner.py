@@ -0,0 +1,63 @@
+import re
+
+
+async def scan_response(response, patterns, until=None, chunk_size=16 * 1024, overlap=1024):
+    """逐块读取响应正文并匹配标记，满足条件后立即停止读取并关闭连接
+
+    patterns为 {名称: bytes正则}，每个模式只记录第一次匹配；until(found)
+    返回True时停止，默认所有模式都找到后停止。相邻块之间保留overlap字节，
+    长度不超过overlap的标记跨块也能匹配；正文未读完时，恰好止于窗口末尾的匹配可能被块边界截断，
+    暂不采用，等下一块到达后在保留的尾部中重新匹配。返回：
+    {"matches": {名称: re.Match或None}, "bytes_read", "bytes_total", "bytes_saved", "early_exit"}
+    bytes_total仅在响应未压缩且带有Content-Length时可知，否则bytes_saved为None。
+    """
+    compiled = {name: re.compile(pattern) if isinstance(pattern, bytes) else pattern
+                for name, pattern in patterns.items()}
+    matches = dict.fromkeys(compiled)
+    if until is None:
+        def until(found):
+            return all(match is not None for match in found.values())
+
+    bytes_read = 0
+    tail = b""
+    early_exit = False
+    while True:
+        chunk = await response.content.read(chunk_size)
+        if not chunk:
+            # 正文已读完，尾部中被暂缓的匹配此时是完整的
+            for name, pattern in compiled.items():
+                if matches[name] is None:
+                    matches[name] = pattern.search(tail)
+            break
+        bytes_read += len(chunk)
+        window = tail + chunk
+        keep_from = max(len(window) - overlap, 0)
+        at_eof = response.content.at_eof()
+        for name, pattern in compiled.items():
+            if matches[name] is None:
+                match = pattern.search(window)
+                if match and match.end() == len(window) and not at_eof:
+                    keep_from = min(keep_from, match.start())
+                    match = None
+                matches[name] = match
+        if until(matches):
+            early_exit = not at_eof
+            break
+        tail = window[keep_from:]
+
+    if early_exit:
+        # 剩余正文不再读取，连接无法复用，直接关闭
+        response.close()
+
+    bytes_total = None
+    if not response.headers.get("Content-Encoding") and response.content_length is not None:
+        bytes_total = response.content_length
+    elif not early_exit:
+        bytes_total = bytes_read
+    return {
+        "matches": matches,
+        "bytes_read": bytes_read,
+        "bytes_total": bytes_total,
+        "bytes_saved": None if bytes_total is None else max(bytes_total - bytes_read, 0),
+        "early_exit": early_exit
+    }
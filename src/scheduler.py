@@ -0,0 +1,235 @@
+import asyncio
+import time
+
+from tracing import span
+
+
+class Check:
+    """检测项声明：依赖、超时、优先级与并发分组"""
+
+    def __init__(self, key, run, depends_on=(), timeout=None, priority=0, group=None, condition=None):
+        self.key = key
+        # run(worker) 返回检测协程
+        self.run = run
+        self.depends_on = tuple(depends_on)
+        self.timeout = timeout
+        # 数值越大越先启动
+        self.priority = priority
+        self.group = group
+        # condition(worker, results) 在依赖全部成功后判断是否执行，返回False则跳过
+        self.condition = condition
+
+
+class CheckRegistry:
+    """检测项注册表，新增检测只需注册而无需修改调度逻辑"""
+
+    def __init__(self):
+        self._checks = {}
+
+    def add(self, check):
+        if check.key in self._checks:
+            raise ValueError(f"Duplicate check: {check.key}")
+        self._checks[check.key] = check
+        return check
+
+    def register(self, key, **options):
+        """装饰器形式的注册：@registry.register("key", depends_on=[...])"""
+        def decorator(run):
+            self.add(Check(key, run, **options))
+            return run
+        return decorator
+
+    def __contains__(self, key):
+        return key in self._checks
+
+    def __iter__(self):
+        return iter(self._checks.values())
+
+    def __len__(self):
+        return len(self._checks)
+
+    def get(self, key):
+        return self._checks[key]
+
+    def validate(self):
+        """检查依赖是否存在以及是否有环"""
+        for check in self:
+            for dep in check.depends_on:
+                if dep not in self._checks:
+                    raise ValueError(f"Check {check.key} depends on unknown check {dep}")
+        visiting, visited = set(), set()
+
+        def visit(key):
+            if key in visited:
+                return
+            if key in visiting:
+                raise ValueError(f"Dependency cycle at check {key}")
+            visiting.add(key)
+            for dep in self._checks[key].depends_on:
+                visit(dep)
+            visiting.discard(key)
+            visited.add(key)
+
+        for key in self._checks:
+            visit(key)
+
+
+class DagScheduler:
+    """按依赖关系调度检测：依赖一旦完成即启动，互不依赖的检测在全局上限内并行"""
+
+    def __init__(self, registry, max_concurrency=8, group_limits=None):
+        registry.validate()
+        self.registry = registry
+        self.max_concurrency = max_concurrency
+        # 各并发分组的上限，未列出的分组不限制
+        self.group_limits = group_limits or {}
+        self.reset()
+
+    def reset(self):
+        self.results = {}
+        self.errors = {}
+        self.skipped = set()
+        # key -> (开始, 结束)，相对本次运行开始的秒数
+        self.timings = {}
+        self.critical_path = []
+        self.critical_path_time = 0.0
+
+    def _downstream_depth(self, key, cache):
+        """该检测及其后续依赖链的最大长度"""
+        if key not in cache:
+            dependents = [check.key for check in self.registry if key in check.depends_on]
+            cache[key] = 1 + max((self._downstream_depth(dep, cache) for dep in dependents), default=0)
+        return cache[key]
+
+    async def _run_check(self, check, worker, timeout):
+        with span(check.key, "check", group=check.group, timeout=timeout):
+            coro = check.run(worker)
+            if timeout is not None:
+                return await asyncio.wait_for(coro, timeout)
+            return await coro
+
+    async def run(self, worker, on_result=None, deadline=None):
+        """运行全部检测，on_result(key, value, error) 在每项完成时被调用
+
+        deadline为time.perf_counter()时间点：每项检测的超时不超过剩余时间按其
+        后续依赖链长度均分后的份额；到达截止时间仍未完成的检测以超时报告。
+        """
+        self.reset()
+        started = time.perf_counter()
+        depths = {}
+        waiting = {check.key: check for check in self.registry}
+        running = {}
+        group_running = {}
+
+        def dependency_state(check):
+            if any(dep in self.skipped or dep in self.errors for dep in check.depends_on):
+                return "skip"
+            if all(dep in self.results for dep in check.depends_on):
+                return "ready"
+            return "wait"
+
+        try:
+            while waiting or running:
+                # 跳过依赖失败/被跳过或条件不满足的检测，直到没有新的跳过产生
+                changed = True
+                while changed:
+                    changed = False
+                    for key, check in list(waiting.items()):
+                        state = dependency_state(check)
+                        if state == "skip" or (state == "ready" and check.condition
+                                               and not check.condition(worker, self.results)):
+                            self.skipped.add(key)
+                            del waiting[key]
+                            changed = True
+
+                ready = sorted(
+                    (check for check in waiting.values() if dependency_state(check) == "ready"),
+                    key=lambda check: -check.priority
+                )
+                for check in ready:
+                    if len(running) >= self.max_concurrency:
+                        break
+                    limit = self.group_limits.get(check.group)
+                    if limit is not None and group_running.get(check.group, 0) >= limit:
+                        continue
+                    del waiting[check.key]
+                    group_running[check.group] = group_running.get(check.group, 0) + 1
+                    now = time.perf_counter()
+                    timeout = check.timeout
+                    if deadline is not None:
+                        share = max(deadline - now, 0) / self._downstream_depth(check.key, depths)
+                        timeout = share if timeout is None else min(timeout, share)
+                    self.timings[check.key] = (now - started, None)
+                    running[asyncio.create_task(self._run_check(check, worker, timeout))] = check
+
+                if not running:
+                    # 剩余检测都无法启动（不应发生，validate已排除环）
+                    self.skipped.update(waiting)
+                    break
+
+                remaining = None if deadline is None else max(deadline - time.perf_counter(), 0)
+                done, _ = await asyncio.wait(running, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    await self._expire(running, waiting, started, worker, on_result)
+                    break
+                for task in done:
+                    check = running.pop(task)
+                    group_running[check.group] -= 1
+                    self.timings[check.key] = (self.timings[check.key][0], time.perf_counter() - started)
+                    error = task.exception()
+                    if error is None:
+                        value = self.results[check.key] = task.result()
+                    else:
+                        value = self.errors[check.key] = error
+                    if on_result:
+                        await on_result(check.key, value, error)
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+
+        self._compute_critical_path()
+        return self.results
+
+    async def _expire(self, running, waiting, started, worker, on_result):
+        """到达截止时间：取消运行中的检测，并将其与已就绪但未启动的检测报告为超时"""
+        now = time.perf_counter() - started
+        expired = []
+        for task, check in list(running.items()):
+            task.cancel()
+            self.timings[check.key] = (self.timings[check.key][0], now)
+            expired.append(check)
+        await asyncio.gather(*running, return_exceptions=True)
+        running.clear()
+        for key, check in list(waiting.items()):
+            if all(dep in self.results for dep in check.depends_on) and (
+                    not check.condition or check.condition(worker, self.results)):
+                expired.append(check)
+            else:
+                self.skipped.add(key)
+            del waiting[key]
+        for check in expired:
+            error = self.errors[check.key] = asyncio.TimeoutError()
+            if on_result:
+                await on_result(check.key, error, error)
+
+    def _compute_critical_path(self):
+        """关键路径：沿依赖链累加耗时的最长路径"""
+        longest = {}
+
+        def path_to(key):
+            if key not in longest:
+                start, end = self.timings[key]
+                best = (0.0, [])
+                for dep in self.registry.get(key).depends_on:
+                    if dep in self.timings and self.timings[dep][1] is not None:
+                        best = max(best, path_to(dep), key=lambda item: item[0])
+                longest[key] = (best[0] + (end - start), best[1] + [key])
+            return longest[key]
+
+        finished = [key for key, (_, end) in self.timings.items() if end is not None]
+        if finished:
+            self.critical_path_time, self.critical_path = max(
+                (path_to(key) for key in finished), key=lambda item: item[0]
+            )
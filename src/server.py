@@ -0,0 +1,242 @@
+"""HTTP服务模式：以JSON与SSE向其他工具提供检测结果
+
+同时到达的请求合并到同一轮正在进行的检测（single-flight），完成的结果在新鲜期内直接返回，
+因此大量客户端同时轮询也只会触发一轮对外探测。
+
+用法示例：
+    python src/server.py --port 8080 --max-age 30
+    curl http://127.0.0.1:8080/results
+    curl http://127.0.0.1:8080/results?max_age=0
+    curl -N http://127.0.0.1:8080/events
+
+接口：
+    GET /results  一轮检测的完整结果；超过新鲜期（max_age秒，可由查询参数覆盖）时等待新一轮
+    GET /events   SSE：逐项推送一轮检测的结果（已送达的先回放），结束时发送done事件
+    GET /metrics  最近一轮的检测结果与耗时（Prometheus/OpenMetrics），抓取不等待检测；
+                  结果超过新鲜期时在后台启动新的一轮
+    GET /healthz  服务状态与合并统计
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import sys
+import time
+
+from aiohttp import web
+
+from geocache import GeoCache
+from history import HistoryStore, result_rows
+from language import LanguageManager
+from metrics import CheckMetrics, negotiate
+from session import SessionManager
+from worker import AsyncWorker
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="IPTest HTTP service")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    parser.add_argument("--port", type=int, default=8080, help="监听端口")
+    parser.add_argument("--max-age", type=float, default=30.0, help="结果的新鲜期（秒），期内的请求直接返回缓存结果")
+    parser.add_argument("--deadline", type=float, default=60.0, help="每轮检测的总时间预算（秒），0表示不限制")
+    parser.add_argument("--throughput", action="store_true", help="同时运行下载测速")
+    parser.add_argument("--no-geo-cache", action="store_true", help="不使用本地IP地理位置缓存")
+    parser.add_argument("--no-history", action="store_true", help="不将结果写入本地历史记录")
+    parser.add_argument("--lang", default="en_US", choices=["zh_CN", "zh_TW", "en_US"], help="结果文本的语言")
+    return parser.parse_args(argv)
+
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+class CheckService:
+    """检测服务：合并并发请求、缓存最近一轮结果，并向SSE订阅者推送逐项结果
+
+    每轮检测对应一个状态字典：
+    {"id", "task", "events": [...], "done": bool, "finished": 完成时间或None, "payload": 结果或None, "error"}
+    events保存已送达的逐项结果，晚加入的订阅者先回放再等待后续结果。
+    """
+
+    def __init__(self, lang_manager, session_manager=None, max_age=30.0, budget=60.0, geo_cache=None,
+                 history=None, **worker_options):
+        self.lang_manager = lang_manager
+        self.session_manager = session_manager or SessionManager()
+        # 结果的新鲜期（秒）
+        self.max_age = max_age
+        # 每轮检测的总时间预算（秒），为None时不限制
+        self.budget = budget
+        self.geo_cache = geo_cache
+        self.history = history
+        self.worker_options = worker_options
+        self.metrics = CheckMetrics()
+        # 已启动的检测轮数与收到的请求数，两者之比即合并效果
+        self.runs = 0
+        self.requests = 0
+        self._state = None
+        self._changed = asyncio.Condition()
+
+    def acquire(self, max_age=None):
+        """返回可用的一轮检测：正在进行的、或仍在新鲜期内的上一轮，否则启动新的一轮"""
+        max_age = self.max_age if max_age is None else max_age
+        self.requests += 1
+        state = self._state
+        if state is not None and not state["done"]:
+            return state
+        if state is not None and state["finished"] is not None and time.time() - state["finished"] <= max_age:
+            return state
+        return self._start()
+
+    def _start(self):
+        self.runs += 1
+        state = {"id": self.runs, "task": None, "events": [], "done": False, "finished": None, "payload": None,
+                 "error": None}
+        self._state = state
+        state["task"] = asyncio.create_task(self._execute(state))
+        return state
+
+    async def _notify(self):
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def _execute(self, state):
+        worker = AsyncWorker(self.lang_manager, session_manager=self.session_manager, geo_cache=self.geo_cache,
+                             **self.worker_options)
+        run_ts = time.time()
+        started = time.perf_counter()
+
+        async def update_callback(key, value):
+            state["events"].append({
+                "run": state["id"],
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+                "key": key,
+                "value": value
+            })
+            await self._notify()
+
+        deadline = started + self.budget if self.budget else None
+        try:
+            async with worker:
+                results = await worker.run_all_checks(update_callback=update_callback, deadline=deadline)
+            duration = time.perf_counter() - started
+            if self.history:
+                self.history.record_run(worker, results, run_ts=run_ts, duration=duration)
+            self.metrics.record_run(worker, results, duration=duration, run_ts=run_ts)
+            state["payload"] = {
+                "run": state["id"],
+                "timestamp": datetime.datetime.fromtimestamp(run_ts).astimezone().isoformat(),
+                "duration_ms": round(duration * 1000, 2),
+                "checks": {
+                    key: {"status": status, "ok": bool(ok), "value": value, "text": text}
+                    for _, key, status, ok, value, text in result_rows(worker, results, None)
+                },
+                "results": results
+            }
+            state["finished"] = time.time()
+        except Exception as e:
+            # 失败的一轮不设置finished，下一个请求会重新启动检测
+            state["error"] = str(e)
+            self.metrics.record_failure()
+        finally:
+            state["done"] = True
+            await self._notify()
+        return state["payload"]
+
+    async def handle_results(self, request):
+        try:
+            max_age = float(request.query["max_age"]) if "max_age" in request.query else None
+        except ValueError:
+            return web.json_response({"error": "max_age must be a number"}, status=400)
+        state = self.acquire(max_age)
+        # 客户端断开只取消本次等待，不影响其他请求共享的检测
+        payload = await asyncio.shield(state["task"])
+        if payload is None:
+            return web.json_response({"run": state["id"], "error": state["error"]}, status=500)
+        return web.json_response(dict(payload, age=round(time.time() - state["finished"], 3)), dumps=_dumps)
+
+    async def handle_events(self, request):
+        try:
+            max_age = float(request.query["max_age"]) if "max_age" in request.query else None
+        except ValueError:
+            return web.json_response({"error": "max_age must be a number"}, status=400)
+        state = self.acquire(max_age)
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        await response.prepare(request)
+        sent = 0
+        try:
+            while True:
+                while sent < len(state["events"]):
+                    event = state["events"][sent]
+                    await response.write(f"event: result\ndata: {_dumps(event)}\n\n".encode('utf-8'))
+                    sent += 1
+                if state["done"]:
+                    break
+                async with self._changed:
+                    await self._changed.wait_for(lambda: state["done"] or sent < len(state["events"]))
+            summary = {"run": state["id"], "ok": state["payload"] is not None}
+            if state["payload"] is not None:
+                summary["duration_ms"] = state["payload"]["duration_ms"]
+            await response.write(f"event: done\ndata: {_dumps(summary)}\n\n".encode('utf-8'))
+        except ConnectionResetError:
+            # 订阅者已断开
+            pass
+        return response
+
+    async def handle_metrics(self, request):
+        # 抓取应尽快返回，只返回当前值；结果过期时由acquire在后台启动新的一轮
+        self.acquire()
+        openmetrics, content_type = negotiate(request.headers.get("Accept"))
+        return web.Response(body=self.metrics.render(openmetrics).encode('utf-8'),
+                            headers={"Content-Type": content_type})
+
+    async def handle_health(self, request):
+        state = self._state
+        return web.json_response({
+            "runs": self.runs,
+            "requests": self.requests,
+            "in_flight": state is not None and not state["done"],
+            "age": None if state is None or state["finished"] is None else round(time.time() - state["finished"], 3)
+        })
+
+    def create_app(self):
+        app = web.Application()
+        app.router.add_get("/results", self.handle_results)
+        app.router.add_get("/events", self.handle_events)
+        app.router.add_get("/metrics", self.handle_metrics)
+        app.router.add_get("/healthz", self.handle_health)
+        app.on_cleanup.append(self._cleanup)
+        return app
+
+    async def _cleanup(self, app):
+        state = self._state
+        if state is not None and not state["done"]:
+            state["task"].cancel()
+            await asyncio.gather(state["task"], return_exceptions=True)
+        await self.session_manager.close()
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    geo_cache = None if args.no_geo_cache else GeoCache()
+    history = None
+    if not args.no_history:
+        history = HistoryStore()
+        history.compact()
+
+    async def create_app():
+        service = CheckService(LanguageManager(args.lang), max_age=args.max_age, budget=args.deadline or None,
+                               geo_cache=geo_cache, history=history, throughput=args.throughput)
+        return service.create_app()
+
+    try:
+        web.run_app(create_app(), host=args.host, port=args.port, handler_cancellation=True, access_log=None)
+    finally:
+        if geo_cache:
+            geo_cache.close()
+        if history:
+            history.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+import aiohttp
+
+from adaptive import AdaptiveTimeouts
+from dnsbench import create_resolver
+from tracing import create_trace_config
+
+
+class SessionManager:
+    """应用生命周期内共享的HTTP会话，使多次刷新之间可以复用已建立的连接"""
+
+    def __init__(self, limit=64, limit_per_host=6, dns_ttl=300, idle_timeout=30.0, force_cold=False, proxy=None,
+                 nameservers=None):
+        # 连接池总上限与单个主机的连接上限
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        # DNS缓存有效期（秒）
+        self.dns_ttl = dns_ttl
+        # 空闲连接保留时长（秒），超时后由连接池自动关闭
+        self.idle_timeout = idle_timeout
+        # 为True时每次获取会话都丢弃旧连接，用于测量首次连接的延迟
+        self.force_cold = force_cold
+        # 出口代理地址（http://、https://、socks4://、socks5://），为None时直连
+        self.proxy = proxy
+        # 自定义DNS服务器列表（需要aiodns），为None时使用系统解析器
+        self.nameservers = nameservers
+        # 按主机统计的RTT与自适应超时，随会话一起在多次运行之间保留
+        self.timeouts = AdaptiveTimeouts()
+        self._session = None
+        # 固定地址族的会话，socket.AF_INET / AF_INET6 -> ClientSession
+        self._family_sessions = {}
+
+    @property
+    def is_socks(self):
+        return bool(self.proxy) and self.proxy.lower().startswith("socks")
+
+    @property
+    def request_proxy(self):
+        """需要随请求传入的HTTP代理地址；SOCKS代理由连接器处理，这里返回None"""
+        return None if not self.proxy or self.is_socks else self.proxy
+
+    def create_connector(self, limit=None, limit_per_host=None, family=0):
+        options = dict(
+            limit=limit or self.limit,
+            limit_per_host=limit_per_host or self.limit_per_host,
+            use_dns_cache=True,
+            ttl_dns_cache=self.dns_ttl,
+            keepalive_timeout=self.idle_timeout
+        )
+        if self.is_socks:
+            # SOCKS代理为可选依赖
+            try:
+                from aiohttp_socks import ProxyConnector
+            except ImportError:
+                raise RuntimeError("SOCKS proxies require the aiohttp-socks package") from None
+            # 由代理负责解析目标域名
+            return ProxyConnector.from_url(self.proxy, rdns=True, **options)
+        if self.nameservers:
+            options["resolver"] = create_resolver(self.nameservers)
+        return aiohttp.TCPConnector(family=family, **options)
+
+    async def get_session(self, cold=None):
+        """获取共享会话，cold为True（或force_cold）时先关闭现有连接"""
+        if cold is None:
+            cold = self.force_cold
+        if cold:
+            await self.close()
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(connector=self.create_connector(), proxy=self.request_proxy,
+                                                  trace_configs=[create_trace_config()])
+        return self._session
+
+    async def get_family_session(self, family):
+        """获取只使用指定地址族（socket.AF_INET/AF_INET6）连接的会话，用于分别发现IPv4与IPv6出口"""
+        session = self._family_sessions.get(family)
+        if session is None or session.closed:
+            session = self._family_sessions[family] = aiohttp.ClientSession(
+                connector=self.create_connector(limit=4, limit_per_host=2, family=family),
+                trace_configs=[create_trace_config()]
+            )
+        return session
+
+    async def close(self):
+        if self._session:
+            await self._session.close()
+            self._session = None
+        sessions, self._family_sessions = self._family_sessions, {}
+        for session in sessions.values():
+            await session.close()
@@ -0,0 +1,43 @@
+import json
+import os
+import time
+
+from storage import data_path
+
+SNAPSHOT_VERSION = 1
+
+
+def snapshot_path():
+    return data_path("last_run.json")
+
+
+def save_snapshot(results, lang, run_ts=None, path=None):
+    """保存最近一次完成的检测结果（按送达界面的顺序），供下次启动时立即显示
+
+    先写入临时文件再替换，程序中途退出时不会留下不完整的快照。
+    """
+    path = path or snapshot_path()
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "ts": run_ts or time.time(),
+        "lang": lang,
+        "results": results
+    }
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f, ensure_ascii=False, default=str)
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(path=None, max_age=7 * 24 * 3600):
+    """读取快照，文件不存在、损坏、版本不符或超过max_age秒时返回None"""
+    try:
+        with open(path or snapshot_path(), 'r', encoding='utf-8') as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get("version") != SNAPSHOT_VERSION:
+        return None
+    if not isinstance(snapshot.get("results"), dict) or time.time() - snapshot.get("ts", 0) > max_age:
+        return None
+    return snapshot
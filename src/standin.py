@@ -0,0 +1,215 @@
+"""本地替身服务：模拟各检测依赖的远程接口，用于离线运行与基准测试
+
+每个路由可单独注入延迟、丢包（直接断开连接）与超时（挂起不响应）。
+"""
+import asyncio
+import json
+import random
+
+from aiohttp import web
+
+# 模拟的出口IP与地理位置
+FOREIGN_IP = "203.0.113.10"
+DOMESTIC_IP = "198.51.100.7"
+IPV6 = "2001:db8::10"
+GEO = {
+    FOREIGN_IP: {"country": "United States", "countryCode": "US", "regionName": "California"},
+    DOMESTIC_IP: {"country": "China", "countryCode": "CN", "regionName": "Shanghai"},
+    IPV6: {"country": "United States", "countryCode": "US", "regionName": "California"}
+}
+
+# 真实页面有数百KB，标记之后补足填充内容，使流式扫描的提前结束可以被测量
+PAGE_PADDING = "<!--" + "x" * (300 * 1024) + "-->"
+GOOGLE_HTML = (
+    '<html><body><a href="https://www.google.com/setprefdomain?prefdom=US&amp;prev=https://www.google.com/">'
+    'Google.com</a></body></html>'
+)
+NETFLIX_HOME_HTML = '<html><script>netflix.reactContext = {"geo":{"requestCountry":{"id":"US"}}};</script></html>'
+YOUTUBE_PREMIUM_HTML = (
+    '<html><script>ytcfg.set({"INNERTUBE_CONTEXT_GL": "US"});</script>'
+    '<body>YouTube Premium: ad-free, background play and downloads.</body></html>'
+)
+
+
+class Fault:
+    """单个路由的故障注入配置，路由名与worker.ENDPOINTS的键相同"""
+
+    def __init__(self, latency=0.0, jitter=0.0, loss=0.0, hang=False, slow=0.0, slow_latency=1.0):
+        # 固定延迟与随机附加延迟（秒）
+        self.latency = latency
+        self.jitter = jitter
+        # 长尾：以slow的概率额外延迟slow_latency秒
+        self.slow = slow
+        self.slow_latency = slow_latency
+        # 直接断开连接的概率
+        self.loss = loss
+        # 为True时挂起不响应，用于触发客户端超时
+        self.hang = hang
+
+
+class StandInServer:
+    """本地aiohttp替身服务，endpoints() 返回可直接传给AsyncWorker的地址表"""
+
+    def __init__(self, faults=None, default=None, netflix_status=(200, 200), netflix_region=None,
+                 academic_name="Example University", throughput_bytes=8 * 1024 * 1024, seed=0):
+        # 路由名 -> Fault，未列出的路由使用default
+        self.faults = faults or {}
+        self.default = default or Fault()
+        # 两个Netflix内容页的状态码
+        self.netflix_status = netflix_status
+        # 设置后内容页跳转到带地区前缀的地址（与真实站点相同），否则区域只能从首页获取
+        self.netflix_region = netflix_region
+        self.academic_name = academic_name
+        self.throughput_bytes = throughput_bytes
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.dropped = 0
+        self.base_url = None
+        # 同时监听::1时的IPv6地址，环境不支持IPv6时为None
+        self.base_url_v6 = None
+        self._runner = None
+
+    async def start(self, host="127.0.0.1", port=0):
+        app = web.Application()
+        app.router.add_post("/ip-api/batch", self._route("ip_api_batch", self.ip_api_batch))
+        app.router.add_get("/ip-api/json", self._route("ip_api_json", self.ip_api_json))
+        app.router.add_get("/ipw", self._route("domestic_ip", self.domestic_ip))
+        app.router.add_get("/ipw6", self._route("ipv6", self.ipv6))
+        # add_get同时注册HEAD
+        app.router.add_get("/probe/{index}", self._route("network_probes", self.probe))
+        app.router.add_get("/google", self._route("google", self.google))
+        app.router.add_get("/github", self._route("github", self.github))
+        app.router.add_get("/cnki", self._route("cnki_login", self.cnki_login))
+        app.router.add_get("/netflix/title/{index}", self._route("netflix_titles", self.netflix_title))
+        app.router.add_get("/netflix/{region}/title/{index}", self._route("netflix_titles", self.netflix_title))
+        app.router.add_get("/netflix/", self._route("netflix_home", self.netflix_home))
+        app.router.add_get("/youtube/premium", self._route("youtube_premium", self.youtube_premium))
+        app.router.add_get("/down", self._route("throughput", self.download))
+        # 客户端超时断开后取消对应的处理函数（包括挂起的路由）
+        self._runner = web.AppRunner(app, access_log=None, shutdown_timeout=0.5, handler_cancellation=True)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.base_url = f"http://{host}:{port}"
+        try:
+            await web.TCPSite(self._runner, "::1", port).start()
+            self.base_url_v6 = f"http://[::1]:{port}"
+        except OSError:
+            self.base_url_v6 = None
+        return self
+
+    async def close(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def endpoints(self):
+        base = self.base_url
+        return {
+            "ip_api_batch": f"{base}/ip-api/batch",
+            "ip_api_json": f"{base}/ip-api/json",
+            "domestic_ip": f"{base}/ipw",
+            # 没有IPv6时使用IPv4地址，IPv6发现会失败，对应“仅IPv4”的网络
+            "ipv6": f"{self.base_url_v6 or base}/ipw6",
+            # 替身服务没有同时解析到两个地址族的主机名，IPv6一侧的对比目标不可达
+            "family_targets": [f"{base}/github"],
+            "network_probes": [f"{base}/probe/{index}" for index in range(5)],
+            "google": f"{base}/google",
+            "github": f"{base}/github",
+            "cnki_login": f"{base}/cnki",
+            "netflix_titles": [f"{base}/netflix/title/{index}" for index in range(2)],
+            "netflix_home": f"{base}/netflix/",
+            "youtube_premium": f"{base}/youtube/premium",
+            "throughput": f"{base}/down"
+        }
+
+    def _route(self, name, handler):
+        async def wrapped(request):
+            self.requests += 1
+            fault = self.faults.get(name, self.default)
+            if fault.hang:
+                await asyncio.sleep(3600)
+            delay = fault.latency + (self.random.random() * fault.jitter if fault.jitter else 0.0)
+            if fault.slow and self.random.random() < fault.slow:
+                delay += fault.slow_latency
+            if delay:
+                await asyncio.sleep(delay)
+            if fault.loss and self.random.random() < fault.loss:
+                # 模拟丢包：不返回任何响应直接断开连接
+                self.dropped += 1
+                if request.transport:
+                    request.transport.close()
+                return web.Response()
+            return await handler(request)
+        return wrapped
+
+    @staticmethod
+    def _geo(ip):
+        info = GEO.get(ip)
+        if info is None:
+            return {"status": "fail", "message": "invalid query", "query": ip}
+        return dict(info, status="success", query=ip)
+
+    async def ip_api_batch(self, request):
+        batch = await request.json()
+        return web.json_response([self._geo(item["query"]) for item in batch])
+
+    async def ip_api_json(self, request):
+        return web.json_response(self._geo(FOREIGN_IP))
+
+    async def domestic_ip(self, request):
+        return web.Response(text=DOMESTIC_IP + "\n")
+
+    async def ipv6(self, request):
+        return web.Response(text=IPV6 + "\n")
+
+    async def probe(self, request):
+        return web.Response(status=204)
+
+    async def google(self, request):
+        return web.Response(text=GOOGLE_HTML + PAGE_PADDING, content_type="text/html")
+
+    async def github(self, request):
+        return web.Response(text="")
+
+    async def cnki_login(self, request):
+        # 与真实接口一致的JSONP风格响应：JSON被一对括号包裹
+        body = {"IsSuccess": bool(self.academic_name), "ShowName": self.academic_name}
+        return web.Response(text=f"({json.dumps(body, ensure_ascii=False)})")
+
+    async def netflix_title(self, request):
+        index = int(request.match_info["index"])
+        status = self.netflix_status[index % len(self.netflix_status)]
+        if status == 200 and self.netflix_region and "region" not in request.match_info:
+            raise web.HTTPFound(f"/netflix/{self.netflix_region.lower()}/title/{index}")
+        return web.Response(status=status, text="")
+
+    async def netflix_home(self, request):
+        return web.Response(text=NETFLIX_HOME_HTML + PAGE_PADDING, content_type="text/html")
+
+    async def youtube_premium(self, request):
+        return web.Response(text=YOUTUBE_PREMIUM_HTML + PAGE_PADDING, content_type="text/html")
+
+    async def download(self, request):
+        response = web.StreamResponse()
+        response.content_length = self.throughput_bytes
+        await response.prepare(request)
+        chunk = bytes(64 * 1024)
+        remaining = self.throughput_bytes
+        try:
+            while remaining > 0:
+                size = min(remaining, len(chunk))
+                await response.write(chunk[:size])
+                remaining -= size
+            await response.write_eof()
+        except ConnectionResetError:
+            # 客户端达到测速上限后主动断开
+            pass
+        return response
@@ -0,0 +1,46 @@
+"""启动耗时测量：在全新进程中导入主模块并构建首屏（警告界面）
+
+由基准测试在子进程中运行，输出一行JSON：
+    {"import_ms": ..., "first_frame_ms": ..., "loaded": [...]}
+不连接Flet客户端，页面命令在本地序列化后丢弃，因此测得的是应用自身的开销。
+"""
+import asyncio
+import itertools
+import json
+import sys
+
+# 主模块必须最先导入，其导入耗时才包含Flet本身
+import main as app
+from flet.core.connection import Connection
+from flet.core.page import Page
+from flet.core.protocol import PageCommandResponsePayload, PageCommandsBatchResponsePayload
+
+
+class OfflineConnection(Connection):
+    """丢弃页面命令的连接，为新增的控件分配本地ID"""
+
+    def __init__(self):
+        super().__init__()
+        self.page_url = "http://localhost"
+        self._ids = itertools.count(1)
+
+    def send_command(self, session_id, command):
+        return PageCommandResponsePayload(result="", error="")
+
+    def send_commands(self, session_id, commands):
+        count = sum(len(command.commands) for command in commands if command.name == "add")
+        ids = " ".join(f"_{next(self._ids)}" for _ in range(count))
+        return PageCommandsBatchResponsePayload(results=[ids] if count else [], error="")
+
+
+async def measure():
+    # 导入主模块后已加载的检测模块，应为空（均在首屏之后于后台导入）
+    loaded = [name for name in ["aiohttp", *app.PRELOAD_MODULES] if name in sys.modules]
+    page = Page(OfflineConnection(), "startup", loop=asyncio.get_running_loop())
+    # main在首屏之后继续等待后台导入，首屏时间由main记录
+    await app.main(page)
+    return dict(app.startup_timings, loaded=loaded)
+
+
+if __name__ == "__main__":
+    print(json.dumps(asyncio.run(measure())))
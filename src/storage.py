@@ -0,0 +1,12 @@
+import os
+
+
+def data_dir():
+    """本地数据目录：打包后的应用使用Flet提供的存储目录，否则使用用户目录下的.iptest"""
+    path = os.getenv("FLET_APP_STORAGE_DATA") or os.path.join(os.path.expanduser("~"), ".iptest")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def data_path(filename):
+    return os.path.join(data_dir(), filename)
@@ -0,0 +1,99 @@
+import asyncio
+import time
+from collections import deque
+
+import aiohttp
+
+
+class _ThroughputMeter:
+    """多个下载流共享的字节计数器，按滑动窗口计算速率"""
+
+    def __init__(self, max_bytes, max_seconds, window):
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.window = window
+        self.started = time.perf_counter()
+        self.total_bytes = 0
+        # (时间戳, 累计字节数)，只保留最近一个窗口内的点
+        self.points = deque([(self.started, 0)])
+        self.window_rates = []
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def exhausted(self):
+        return self.total_bytes >= self.max_bytes or self.elapsed() >= self.max_seconds
+
+    def add(self, size):
+        self.total_bytes += size
+        now = time.perf_counter()
+        self.points.append((now, self.total_bytes))
+        while len(self.points) > 2 and now - self.points[1][0] >= self.window:
+            self.points.popleft()
+
+    def window_rate(self):
+        """最近一个窗口内的速率（字节/秒）"""
+        (start, start_bytes), (end, end_bytes) = self.points[0], self.points[-1]
+        if end <= start:
+            return 0.0
+        return (end_bytes - start_bytes) / (end - start)
+
+    def summary(self):
+        elapsed = self.elapsed()
+        return {
+            "bytes": self.total_bytes,
+            "seconds": elapsed,
+            "average_bps": self.total_bytes / elapsed if elapsed > 0 else 0.0,
+            "current_bps": self.window_rate(),
+            "peak_bps": max(self.window_rates, default=self.window_rate()),
+            "window_bps": list(self.window_rates)
+        }
+
+
+async def measure_throughput(session, url, streams=1, max_bytes=50 * 1024 * 1024, max_seconds=10.0,
+                             window=0.5, on_progress=None, headers=None):
+    """下载测速：逐块取出连接已接收的数据并立即丢弃，不在内存中保留响应体
+
+    aiohttp的StreamReader没有readinto，read(n)在缓冲块大于n时还会切片复制；readchunk直接交出
+    解析器已分配的缓冲块，不再额外分配或复制，效果等同于复用缓冲区。
+
+    streams > 1 时并行多个下载流以跑满带宽；总字节数达到max_bytes或
+    耗时达到max_seconds即停止。on_progress(summary) 每个窗口调用一次。
+    """
+    meter = _ThroughputMeter(max_bytes, max_seconds, window)
+    timeout = aiohttp.ClientTimeout(total=None, sock_connect=5, sock_read=5)
+
+    async def stream():
+        while not meter.exhausted():
+            async with session.get(url, headers=headers, timeout=timeout) as response:
+                response.raise_for_status()
+                while not meter.exhausted():
+                    chunk, end_of_http_chunk = await response.content.readchunk()
+                    if not chunk:
+                        # (b"", True)只表示分块传输的块边界，(b"", False)才是正文结束
+                        if end_of_http_chunk:
+                            continue
+                        break
+                    meter.add(len(chunk))
+
+    async def report():
+        while True:
+            await asyncio.sleep(window)
+            meter.window_rates.append(meter.window_rate())
+            if on_progress:
+                await on_progress(meter.summary())
+
+    stream_tasks = [asyncio.create_task(stream()) for _ in range(max(streams, 1))]
+    reporter = asyncio.create_task(report())
+    try:
+        # 单个下载流失败不影响其他流，超过时间上限的读取直接取消
+        done, _ = await asyncio.wait(stream_tasks, timeout=max_seconds)
+        errors = [task.exception() for task in done if task.exception()]
+        if errors and meter.total_bytes == 0:
+            raise errors[0]
+    finally:
+        for task in stream_tasks + [reporter]:
+            task.cancel()
+        await asyncio.gather(*stream_tasks, reporter, return_exceptions=True)
+
+    return meter.summary()
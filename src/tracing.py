@@ -0,0 +1,148 @@
+import asyncio
+import contextlib
+import contextvars
+import json
+import time
+
+import aiohttp
+
+# 当前运行的Tracer，由AsyncWorker.run_all_checks设置，其中创建的任务自动继承
+current_tracer = contextvars.ContextVar("current_tracer", default=None)
+# 当前所属的检测，检测内创建的请求与子任务记录在同一分组下
+current_group = contextvars.ContextVar("current_group", default="run")
+# 当前请求尝试的响应头回调，由AdaptiveTimeouts设置，收到最终响应头时调用
+response_headers_hook = contextvars.ContextVar("response_headers_hook", default=None)
+
+
+def _outcome(error):
+    if error is None:
+        return "ok"
+    if isinstance(error, asyncio.CancelledError):
+        return "cancelled"
+    if isinstance(error, asyncio.TimeoutError):
+        return "timeout"
+    return "error"
+
+
+class Tracer:
+    """记录一轮检测中的各个区间（检测、请求、重试、界面回调），时间为相对开始的秒数"""
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.spans = []
+        # asyncio任务 -> 泳道编号，导出时同一任务中的区间显示在同一行
+        self._lanes = {}
+
+    def _lane(self):
+        task = asyncio.current_task()
+        key = id(task) if task else 0
+        if key not in self._lanes:
+            self._lanes[key] = len(self._lanes) + 1
+        return self._lanes[key]
+
+    def begin(self, name, category, **args):
+        span = {
+            "name": name,
+            "category": category,
+            "start": time.perf_counter() - self.origin,
+            "end": None,
+            "outcome": None,
+            "group": current_group.get(),
+            "lane": self._lane(),
+            "args": args
+        }
+        self.spans.append(span)
+        return span
+
+    def end(self, span, outcome="ok", **args):
+        span["end"] = time.perf_counter() - self.origin
+        # 调用方预先设置的结果（如retry）优先
+        span["outcome"] = span["outcome"] or outcome
+        span["args"].update(args)
+        return span
+
+    @contextlib.contextmanager
+    def span(self, name, category, **args):
+        # 检测区间开启新的分组
+        token = current_group.set(name) if category == "check" else None
+        span = self.begin(name, category, **args)
+        try:
+            yield span
+        except BaseException as e:
+            self.end(span, _outcome(e))
+            raise
+        finally:
+            if token is not None:
+                current_group.reset(token)
+        self.end(span)
+
+    def by_category(self, category):
+        return [span for span in self.spans if span["category"] == category]
+
+    def to_chrome_trace(self):
+        """导出为Chrome trace-event格式（可在chrome://tracing或Perfetto中打开）
+
+        每个检测显示为一个进程，其中的每个asyncio任务为一个线程。
+        """
+        events = []
+        groups = {}
+        for span in self.spans:
+            if span["group"] not in groups:
+                groups[span["group"]] = len(groups) + 1
+                events.append({"name": "process_name", "ph": "M", "pid": groups[span["group"]],
+                               "args": {"name": span["group"]}})
+            end = span["end"] if span["end"] is not None else time.perf_counter() - self.origin
+            events.append({
+                "name": span["name"],
+                "cat": span["category"],
+                "ph": "X",
+                "ts": round(span["start"] * 1_000_000, 1),
+                "dur": round((end - span["start"]) * 1_000_000, 1),
+                "pid": groups[span["group"]],
+                "tid": span["lane"],
+                "args": dict(span["args"], outcome=span["outcome"] or "unfinished")
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_chrome_trace(), f, ensure_ascii=False, default=str)
+        return path
+
+
+@contextlib.contextmanager
+def span(name, category, **args):
+    """在当前Tracer中记录一个区间，没有Tracer时不做任何事"""
+    tracer = current_tracer.get()
+    if tracer is None:
+        yield None
+        return
+    with tracer.span(name, category, **args) as item:
+        yield item
+
+
+def create_trace_config():
+    """为aiohttp会话中的每个HTTP请求记录区间"""
+    trace_config = aiohttp.TraceConfig()
+
+    async def on_request_start(session, ctx, params):
+        tracer = current_tracer.get()
+        ctx.tracer = tracer
+        if tracer is not None:
+            ctx.span = tracer.begin(f"{params.method} {params.url.host}", "request", url=str(params.url))
+
+    async def on_request_end(session, ctx, params):
+        hook = response_headers_hook.get()
+        if hook is not None:
+            hook()
+        if ctx.tracer is not None:
+            ctx.tracer.end(ctx.span, status=params.response.status)
+
+    async def on_request_exception(session, ctx, params):
+        if ctx.tracer is not None:
+            ctx.tracer.end(ctx.span, _outcome(params.exception), error=type(params.exception).__name__)
+
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_request_exception.append(on_request_exception)
+    return trace_config
@@ -0,0 +1,747 @@
+import aiohttp
+import asyncio
+import html
+import json
+import re
+import socket
+import time
+from adaptive import AdaptiveTimeouts
+from dnsbench import create_resolver
+from language import RESTRICTED_COUNTRY_CODES
+from latency import compare_families, measure_latency
+from probe import quorum_probe
+from scanner import scan_response
+from throughput import measure_throughput
+from scheduler import Check, CheckRegistry, DagScheduler
+from tracing import Tracer, create_trace_config, current_tracer, span
+
+# 各检测使用的远程地址，可通过AsyncWorker(endpoints=...)替换（如离线基准测试的本地替身服务）
+ENDPOINTS = {
+    "ip_api_batch": 'http://ip-api.com/batch',
+    "ip_api_json": 'http://ip-api.com/json',
+    "domestic_ip": 'https://4.ipw.cn',
+    "ipv6": 'https://6.ipw.cn',
+    # 双栈延迟对比的目标，需同时具有A与AAAA记录
+    "family_targets": [
+        'https://www.google.com/generate_204',
+        'https://www.cloudflare.com/cdn-cgi/trace'
+    ],
+    "network_probes": [
+        'https://www.v2ex.com/generate_204',
+        'https://www.youtube.com/generate_204',
+        'https://mullvad.net/en',
+        'https://www.theguardian.com/international',
+        'https://bridges.torproject.org'
+    ],
+    "google": 'https://www.google.com',
+    "github": 'https://raw.githubusercontent.com',
+    "cnki_login": 'https://login.cnki.net/TopLogin/api/loginapi/IpLoginFlush',
+    # 测试两个不同的Netflix内容（LEGO Ninjago和Breaking Bad）
+    "netflix_titles": [
+        'https://www.netflix.com/title/81280792',
+        'https://www.netflix.com/title/70143836'
+    ],
+    "netflix_home": 'https://www.netflix.com/',
+    "youtube_premium": 'https://www.youtube.com/premium',
+    "throughput": 'https://speed.cloudflare.com/__down?bytes=100000000'
+}
+
+class AsyncWorker:
+    # 受限制的国家代码
+    RESTRICTED_COUNTRY_CODES = RESTRICTED_COUNTRY_CODES
+
+    def __init__(self, lang_manager, probe_concurrency=5, session_manager=None, registry=None, max_concurrency=8,
+                 latency_samples=5, throughput=False, throughput_streams=4,
+                 geo_cache=None, endpoints=None, timeouts=None, group_limits=None):
+        self.session = None
+        # 远程地址表，未指定的项使用ENDPOINTS中的默认值
+        self.endpoints = dict(ENDPOINTS, **(endpoints or {}))
+        self.lang_manager = lang_manager
+        # 检测项注册表与全局并发上限
+        self.registry = registry or DEFAULT_CHECKS
+        self.max_concurrency = max_concurrency
+        # 各并发分组的上限，默认使用DEFAULT_GROUP_LIMITS
+        self.group_limits = DEFAULT_GROUP_LIMITS if group_limits is None else group_limits
+        # 最近一次网络自由度检测是否通过，流媒体检测依赖该结果
+        self.network_free = False
+        # 最近一次网络自由度检测的探测统计（成功数/总数）
+        self.network_probe = None
+        # 最近一次运行的调度器，可从中读取各检测耗时与关键路径
+        self.last_schedule = None
+        # 共享的会话管理器，为None时每个worker使用独立的会话
+        self.session_manager = session_manager
+        # 网络自由度检测的最大并发探测数
+        self.probe_concurrency = probe_concurrency
+        # 延迟测试的采样次数（首个为冷连接）及各目标的详细延迟报告
+        self.latency_samples = latency_samples
+        self.latency_reports = {}
+        # 是否运行下载测速及并行下载流数量
+        self.throughput = throughput
+        self.throughput_streams = throughput_streams
+        self.throughput_report = None
+        # 各检测的机器可读结果（状态、区域等），与界面显示的本地化文本相对应
+        self.check_status = {}
+        # 流式扫描页面时各检测读取与节省的字节数
+        self.scan_reports = {}
+        # IP地理位置缓存，为None时每次都请求ip-api
+        self.geo_cache = geo_cache
+        # 当前运行的结果回调，供需要推送中间结果的检测使用
+        self.update_callback = None
+        # 最近一次运行的追踪记录（检测、请求、重试与界面回调的区间）
+        self.tracer = None
+        # 与IPv4同时发起的IPv6出口发现任务，以及双栈延迟对比报告
+        self._ipv6_task = None
+        self.family_report = None
+        # 没有会话管理器时自行创建的固定地址族会话
+        self._family_sessions = {}
+        # 按主机自适应的超时与对冲请求，默认与会话管理器共享，使多次运行之间积累RTT统计
+        self.timeouts = timeouts or (session_manager.timeouts if session_manager else AdaptiveTimeouts())
+        # 定义受限制的国家信息
+        self.restricted_countries = {
+            code: {
+                lang: self.lang_manager.get_text(f'countries.{code}')
+                for lang in ['zh_CN', 'zh_TW', 'en_US']
+            }
+            for code in self.RESTRICTED_COUNTRY_CODES
+        }
+        # 定义通用请求头
+        self.browser_headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36',
+            'Accept-Language': 'en-US,en;q=0.9',
+            'sec-ch-ua': '"Google Chrome";v="125", "Chromium";v="125", "Not.A/Brand";v="24"',
+            'sec-ch-ua-mobile': '?0',
+            'sec-ch-ua-platform': '"Windows"',
+            'sec-fetch-site': 'none',
+            'sec-fetch-mode': 'navigate',
+            'sec-fetch-user': '?1',
+            'sec-fetch-dest': 'document'
+        }
+
+    async def __aenter__(self):
+        await self.create_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close_session()
+
+    async def create_session(self):
+        if not self.session:
+            if self.session_manager:
+                self.session = await self.session_manager.get_session()
+            else:
+                self.session = aiohttp.ClientSession(trace_configs=[create_trace_config()])
+
+    async def close_session(self):
+        if self.session:
+            # 共享会话由会话管理器负责关闭，这里只释放引用
+            if not self.session_manager:
+                await self.session.close()
+            self.session = None
+        sessions, self._family_sessions = self._family_sessions, {}
+        for session in sessions.values():
+            await session.close()
+
+    @property
+    def direct(self):
+        """是否直连（未经出口代理）"""
+        return not (self.session_manager and self.session_manager.proxy)
+
+    async def family_session(self, family):
+        """只使用指定地址族连接的会话；经代理检测时地址族由代理决定，直接使用主会话"""
+        if not self.direct:
+            return self.session
+        if self.session_manager:
+            return await self.session_manager.get_family_session(family)
+        session = self._family_sessions.get(family)
+        if session is None:
+            session = self._family_sessions[family] = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(family=family),
+                trace_configs=[create_trace_config()]
+            )
+        return session
+
+    def latency_options(self):
+        """延迟测试使用与主会话相同的代理或DNS服务器"""
+        manager = self.session_manager
+        if not manager:
+            return {}
+        if not manager.proxy:
+            return {"resolver": create_resolver(manager.nameservers)} if manager.nameservers else {}
+        return {
+            "connector": manager.create_connector(limit_per_host=1),
+            "proxy": manager.request_proxy
+        }
+
+    async def scan(self, key, response, patterns, until=None):
+        """流式扫描响应正文，找到所需标记后即停止读取，并记录读取/节省的字节数"""
+        report = await scan_response(response, patterns, until=until)
+        self.scan_reports[key] = {name: value for name, value in report.items() if name != "matches"}
+        return report["matches"]
+
+    def set_status(self, key, status, **fields):
+        """记录检测的机器可读结果"""
+        self.check_status[key] = dict(fields, status=status)
+
+    def remember_ip_geo(self, info):
+        """将ip-api的成功结果写入缓存"""
+        if self.geo_cache and info.get("status") == "success" and info.get("query"):
+            self.geo_cache.put(info["query"], info)
+
+    async def lookup_ip_geo(self, ips):
+        """批量查询IP地理位置，命中缓存的直接返回，其余通过一次ip-api批量请求获取"""
+        results = {}
+        missing = []
+        for ip in dict.fromkeys(ips):
+            cached = self.geo_cache.get(ip) if self.geo_cache else None
+            if cached:
+                results[ip] = cached
+            else:
+                missing.append(ip)
+        # ip-api批量接口单次最多100个IP
+        for offset in range(0, len(missing), 100):
+            batch = [{"query": ip} for ip in missing[offset:offset + 100]]
+            async with self.session.post(self.endpoints['ip_api_batch'], json=batch, timeout=5) as response:
+                for info in await response.json():
+                    self.remember_ip_geo(info)
+                    results[info.get("query")] = info
+        return results
+
+    async def fetch_foreign_ip_info(self):
+        """获取面向境外网站的IP及其地理位置"""
+        async def fetch(timeout):
+            async with self.session.get(self.endpoints['ip_api_json'], timeout=timeout) as response:
+                return await response.json()
+        info = await self.timeouts.run(self.endpoints['ip_api_json'], fetch, 5)
+        self.remember_ip_geo(info)
+        return info
+
+    async def fetch_domestic_ip(self):
+        """获取面向中国网站的IP（IPv4）"""
+        session = await self.family_session(socket.AF_INET)
+
+        async def fetch(timeout):
+            async with session.get(self.endpoints['domestic_ip'], timeout=timeout) as response:
+                return (await response.text()).strip()
+        return await self.timeouts.run(self.endpoints['domestic_ip'], fetch, 5)
+
+    async def fetch_ipv6(self):
+        """通过只使用IPv6的连接获取IPv6出口地址"""
+        session = await self.family_session(socket.AF_INET6)
+
+        async def fetch(timeout):
+            async with session.get(self.endpoints['ipv6'], timeout=timeout) as response:
+                return (await response.text()).strip()
+        return await self.timeouts.run(self.endpoints['ipv6'], fetch, 5)
+
+    async def get_ip_info(self):
+        # 同时获取国外IP信息、国内IPv4与IPv6出口，IPv6结果由双栈检测项使用
+        domestic_task = asyncio.create_task(self.fetch_domestic_ip())
+        if self.direct and self._ipv6_task is None:
+            self._ipv6_task = asyncio.create_task(self.fetch_ipv6())
+        try:
+            foreign_ip_info = await self.fetch_foreign_ip_info()
+
+            # 检查是否在受限制国家，是则立即取消国内IP查询
+            if foreign_ip_info.get("countryCode") in self.RESTRICTED_COUNTRY_CODES:
+                return {
+                    "ip": foreign_ip_info["query"],
+                    "region": f'{foreign_ip_info["regionName"]}, {foreign_ip_info["country"]}',
+                    "restricted": True,
+                    "country_code": foreign_ip_info["countryCode"]
+                }
+
+            domestic_ip = await domestic_task
+
+            # 比较两个IP是否相同，不同时再查询国内IP的详细信息
+            if domestic_ip == foreign_ip_info["query"]:
+                return {"ip": domestic_ip, "region": f'{foreign_ip_info["regionName"]}, {foreign_ip_info["country"]}'}
+            domestic_ip_info = (await self.lookup_ip_geo([domestic_ip]))[domestic_ip]
+            return {
+                "domestic_ip": domestic_ip,
+                "domestic_region": f'{domestic_ip_info["regionName"]}, {domestic_ip_info["country"]}',
+                "foreign_ip": foreign_ip_info["query"],
+                "foreign_region": f'{foreign_ip_info["regionName"]}, {foreign_ip_info["country"]}'
+            }
+        except asyncio.TimeoutError:
+            return {"error": self.lang_manager.get_text("errors.timeout")}
+        except Exception as e:
+            return {"error": f"{self.lang_manager.get_text('errors.ip_error_prefix')}{e}"}
+        finally:
+            # 取消未完成的国内IP查询，并取回其异常以免未处理的任务告警
+            domestic_task.cancel()
+            await asyncio.gather(domestic_task, return_exceptions=True)
+
+    async def check_network_freedom(self):
+        urls = self.endpoints['network_probes']
+
+        async def head(url, timeout):
+            async with self.session.head(url, timeout=timeout) as response:
+                if response.status not in [204, 200]:
+                    raise aiohttp.ClientResponseError(response.request_info, response.history,
+                                                      status=response.status)
+                return True
+
+        async def probe(url):
+            # 失败后立即重试，超过该主机的p95仍未响应时发出对冲请求，两次尝试共用原来的4秒
+            try:
+                return await self.timeouts.run(url, lambda timeout: head(url, timeout), 2, budget=4, key=f"HEAD {url}")
+            except Exception:
+                return False
+
+        # 并发探测，多数结果确定后立即返回判定；其余探测在后台继续，运行结束前以实际成功数更新结果
+        result = await quorum_probe(probe, urls, concurrency=self.probe_concurrency, background=True)
+        self.network_free = result["passed"]
+        self.network_probe = result
+        self.set_network_status()
+        return self.network_status_text()
+
+    def set_network_status(self):
+        """记录网络自由度的判定，全部探测完成后才记录实际成功数"""
+        probe = self.network_probe
+        fields = {"success": probe["success"], "total": probe["total"]} if probe["complete"] else {}
+        self.set_status("network_status", "free" if probe["passed"] else "restricted", **fields)
+
+    def network_status_text(self):
+        """网络自由度的显示文本，判定时的计数并非实际结果，全部探测完成后才附带成功数"""
+        probe = self.network_probe
+        if not probe["passed"]:
+            return self.lang_manager.get_text('main.network_status.status_restricted')
+        text = self.lang_manager.get_text('main.network_status.status_free')
+        if probe["complete"]:
+            text += f"（{probe['success']}/{probe['total']}）"
+        return text
+
+    async def settle_network_probe(self, results, update_callback, deadline):
+        """等待网络自由度判定后仍在后台进行的探测（最多到deadline），以实际成功数更新状态与显示文本"""
+        probe = self.network_probe
+        if not probe or not probe["task"] or "network_status" not in results:
+            return
+        try:
+            await asyncio.wait_for(probe["task"], None if deadline is None else max(deadline - time.perf_counter(), 0))
+        except asyncio.TimeoutError:
+            return
+        self.set_network_status()
+        text = self.network_status_text()
+        if text != results["network_status"]:
+            results["network_status"] = text
+            if update_callback:
+                await update_callback("network_status", text)
+
+    async def extract_prefdomain_url(self):
+        try:
+            async def fetch(timeout):
+                async with self.session.get(self.endpoints['google'], timeout=timeout) as response:
+                    # 只需找到第一个setprefdomain链接，无需下载并解析整个首页
+                    return await self.scan("google_region", response, {
+                        "link": rb'<a\s[^>]*?href=["\']([^"\']*setprefdomain[^"\']*)["\']'
+                    })
+            matches = await self.timeouts.run(self.endpoints['google'], fetch, 5)
+            link = matches["link"]
+
+            if link:
+                href = html.unescape(link.group(1).decode('utf-8', 'replace'))
+                domain = href.split('//')[1].split('/')[0]
+                prefdom = href.split('=')[1].split('&')[0]
+                if domain == 'www.google.com.hk' and prefdom == 'US':
+                    prefdom = 'CN'
+                self.set_status("google_region", "ok", region=prefdom)
+                return prefdom
+            self.set_status("google_region", "ok", region="GLOBAL")
+            return self.lang_manager.get_text("main.google.global")
+        except asyncio.TimeoutError:
+            self.set_status("google_region", "timeout")
+            return self.lang_manager.get_text("errors.google_timeout")
+        except Exception:
+            self.set_status("google_region", "error")
+            return self.lang_manager.get_text("errors.google_error")
+
+    async def raw_githubusercontent_speed_test(self):
+        try:
+            # 首个样本为冷连接，其余复用连接，拆分DNS/TCP/TLS/首字节耗时；全部样本共用10秒，
+            # 慢速链路上不会因逐个等满超时而被整项取消，已完成的样本照常报告
+            report = await measure_latency(self.endpoints['github'], samples=self.latency_samples, timeout=5,
+                                           budget=10, **self.latency_options())
+            self.latency_reports["github_speed"] = report
+            unit = self.lang_manager.get_text('network_test.speed_unit')
+
+            def fmt(value):
+                return "-" if value is None else f"{value:.1f}"
+
+            breakdown = self.lang_manager.get_text('network_test.latency_breakdown').format(
+                dns=fmt(report["dns_ms"]),
+                tcp=fmt(report["tcp_connect_ms"]),
+                tls=fmt(report["tls_handshake_ms"]),
+                ttfb=fmt(report["ttfb_ms"]),
+                p50=fmt(report["p50_ms"]),
+                p95=fmt(report["p95_ms"]),
+                jitter=fmt(report["jitter_ms"]),
+                unit=unit
+            )
+            self.set_status("github_speed", "ok", latency_ms=report["cold_total_ms"])
+            return f"{report['cold_total_ms']:.2f} {unit}\n{breakdown}"
+        except asyncio.TimeoutError:
+            self.set_status("github_speed", "timeout")
+            return self.lang_manager.get_text("errors.github_timeout")
+        except Exception as e:
+            self.set_status("github_speed", "error")
+            return self.lang_manager.get_text("errors.github_error")
+
+    async def get_auto_login_name(self):
+        try:
+            headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
+
+            async def fetch(timeout):
+                async with self.session.get(self.endpoints['cnki_login'], headers=headers, timeout=timeout) as response:
+                    return await response.text()
+            text = await self.timeouts.run(self.endpoints['cnki_login'], fetch, 5)
+            result = json.loads(text[1:-1])
+            if result.get('IsSuccess'):
+                self.set_status("academic_name", "ok", name=result.get('ShowName'))
+                return result.get('ShowName')
+            self.set_status("academic_name", "none")
+            return None
+        except asyncio.TimeoutError:
+            self.set_status("academic_name", "timeout")
+            return self.lang_manager.get_text("errors.timeout")
+        except Exception:
+            self.set_status("academic_name", "error")
+            return None
+
+    async def check_netflix(self):
+        """检测Netflix解锁状态"""
+        try:
+            # 测试两个不同的Netflix内容（LEGO Ninjago和Breaking Bad）
+            urls = self.endpoints['netflix_titles']
+            
+            # 更新请求头以完全匹配shell脚本
+            headers = {
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36',
+                'accept-language': 'en-US,en;q=0.9',
+                'sec-ch-ua': '"Google Chrome";v="125", "Chromium";v="125", "Not.A/Brand";v="24"',
+                'sec-ch-ua-mobile': '?0',
+                'sec-ch-ua-platform': '"Windows"',
+                'sec-fetch-site': 'none',
+                'sec-fetch-mode': 'navigate',
+                'sec-fetch-user': '?1',
+                'sec-fetch-dest': 'document',
+                'host': 'www.netflix.com'
+            }
+            
+            region_pattern = {"region": rb'"id":"([A-Z]{2})"'}
+
+            async def fetch_title(index, url, timeout):
+                async with self.session.get(
+                    url,
+                    headers=headers,
+                    timeout=timeout,
+                    allow_redirects=True  # 允许跟随重定向
+                ) as response:
+                    # 跳转后的地址带有地区前缀，如 /jp/title/... 或 /jp-en/title/...
+                    prefix = re.search(r'/([a-z]{2})(?:-[a-z]{2})?/title/', response.url.path)
+                    if prefix:
+                        return response.status, prefix.group(1).upper()
+                    if response.status == 200:
+                        # 内容页同样带有地区标记，找到后立即停止读取
+                        matches = await self.scan(f"netflix_title_{index}", response, region_pattern)
+                        region_match = matches["region"]
+                        return response.status, region_match.group(1).decode() if region_match else None
+                    return response.status, None
+
+            async def probe_title(index, url):
+                """返回 (状态码, 区域)，网络错误时状态码为0"""
+                try:
+                    return await self.timeouts.run(url, lambda timeout: fetch_title(index, url, timeout), 10)
+                except Exception:
+                    return 0, None
+
+            async def fetch_home(timeout):
+                async with self.session.get(
+                    self.endpoints['netflix_home'],
+                    headers=headers,
+                    timeout=timeout,
+                    allow_redirects=True
+                ) as response:
+                    matches = await self.scan("netflix", response, region_pattern)
+                    region_match = matches["region"]
+                    return region_match.group(1).decode() if region_match else None
+
+            async def fetch_home_region():
+                return await self.timeouts.run(self.endpoints['netflix_home'], fetch_home, 10)
+
+            # 两个内容页与首页区域同时请求，结果确定后取消其余请求
+            title_tasks = {asyncio.create_task(probe_title(index, url)): index for index, url in enumerate(urls)}
+            home_task = asyncio.create_task(fetch_home_region())
+            results = [None] * len(urls)
+            region = None
+            try:
+                pending = set(title_tasks)
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        results[title_tasks[task]], title_region = task.result()
+                        region = region or title_region
+                    # 网络错误或403已能决定结果，不再等待另一个内容页
+                    if 0 in results or 403 in results:
+                        break
+                    if region:
+                        # 内容页已给出区域，不再需要首页
+                        home_task.cancel()
+
+                # 分析结果
+                if 0 in results:
+                    self.set_status("netflix", "network_error")
+                    return self.lang_manager.get_text("main.streaming.netflix.network_error")
+
+                if 403 in results:
+                    self.set_status("netflix", "unavailable")
+                    return self.lang_manager.get_text("main.streaming.netflix.unavailable")
+
+                if all(code == 404 for code in results):
+                    self.set_status("netflix", "originals_only")
+                    return self.lang_manager.get_text("main.streaming.netflix.originals_only")
+
+                if 200 in results:
+                    if region is None:
+                        try:
+                            region = await home_task
+                        except Exception:
+                            region = None
+                    region = region or "UNKNOWN"
+                    self.set_status("netflix", "available", region=region)
+                    return self.lang_manager.get_text("main.streaming.netflix.available").format(region=region)
+            finally:
+                leftover = [task for task in (*title_tasks, home_task) if not task.done()]
+                for task in leftover:
+                    task.cancel()
+                await asyncio.gather(*leftover, return_exceptions=True)
+
+            self.set_status("netflix", "error")
+            return self.lang_manager.get_text("main.streaming.netflix.error").format(error=f"{results[0]}_{results[1]}")
+            
+        except Exception as e:
+            self.set_status("netflix", "error")
+            return self.lang_manager.get_text("main.streaming.netflix.error").format(error=str(e))
+
+    async def check_youtube_premium(self):
+        """检测YouTube Premium解锁状态"""
+        try:
+            headers = self.browser_headers.copy()
+            headers['cookie'] = 'YSC=FSCWhKo2Zgw; VISITOR_PRIVACY_METADATA=CgJERRIEEgAgYQ%3D%3D; PREF=f7=4000; __Secure-YEC=CgtRWTBGTFExeV9Iayjele2yBjIKCgJERRIEEgAgYQ%3D%3D; SOCS=CAISOAgDEitib3FfaWRlbnRpdHlmcm9udGVuZHVpc2VydmVyXzIwMjQwNTI2LjAxX3AwGgV6aC1DTiACGgYIgMnpsgY; VISITOR_INFO1_LIVE=Di84mAIbgKY; __Secure-BUCKET=CGQ'
+            
+            async def fetch(timeout):
+                async with self.session.get(
+                    self.endpoints['youtube_premium'],
+                    headers=headers,
+                    timeout=timeout
+                ) as response:
+                    # 只有重定向到google.cn或明确不可用时结论不会再变，可停止读取；
+                    # 区域与可用标记都已找到时，页面后部仍可能出现不可用标记，需读完整个页面
+                    return await self.scan("youtube", response, {
+                        "google_cn": rb'www\.google\.cn',
+                        "not_available": re.compile(rb'premium is not available in your country', re.IGNORECASE),
+                        "region": rb'"INNERTUBE_CONTEXT_GL"\s*:\s*"([^"]+)"',
+                        "ad_free": re.compile(rb'ad-free', re.IGNORECASE)
+                    }, until=lambda found: bool(found["google_cn"] or found["not_available"]))
+
+            matches = await self.timeouts.run(self.endpoints['youtube_premium'], fetch, 10)
+
+            # 检查是否重定向到google.cn
+            if matches["google_cn"]:
+                self.set_status("youtube", "unavailable", region="CN")
+                return self.lang_manager.get_text("main.streaming.youtube.unavailable_cn")
+            
+            # 检查是否不可用
+            if matches["not_available"]:
+                self.set_status("youtube", "unavailable")
+                return self.lang_manager.get_text("main.streaming.youtube.unavailable")
+            
+            # 获取区域信息
+            region_match = matches["region"]
+            region = region_match.group(1).decode('utf-8', 'replace') if region_match else "UNKNOWN"
+            
+            # 检查是否可用
+            if matches["ad_free"]:
+                self.set_status("youtube", "available", region=region)
+                return self.lang_manager.get_text("main.streaming.youtube.available").format(region=region)
+            
+            self.set_status("youtube", "error")
+            return self.lang_manager.get_text("main.streaming.youtube.error")
+            
+        except Exception as e:
+            self.set_status("youtube", "network_error")
+            return self.lang_manager.get_text("main.streaming.youtube.network_error")
+
+    async def compare_address_families(self):
+        """双栈检测：取得IPv6出口，并分别只用IPv4与IPv6测量到相同目标的延迟"""
+        task = self._ipv6_task or asyncio.create_task(self.fetch_ipv6())
+        try:
+            ipv6 = await task
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            ipv6 = None
+        result = {"ipv6": ipv6, "ipv6_region": None, "v4_ms": None, "v6_ms": None}
+        if not ipv6:
+            self.set_status("dual_stack", "v4_only")
+            return result
+
+        async def region():
+            try:
+                info = (await self.lookup_ip_geo([ipv6])).get(ipv6, {})
+            except Exception:
+                return None
+            if info.get("status") != "success":
+                return None
+            return f'{info["regionName"]}, {info["country"]}'
+
+        result["ipv6_region"], self.family_report = await asyncio.gather(
+            region(), compare_families(self.endpoints['family_targets'])
+        )
+        result["v4_ms"] = self.family_report["v4"]["p50_ms"]
+        result["v6_ms"] = self.family_report["v6"]["p50_ms"]
+        # 有IPv6出口但IPv6访问不到任何目标，说明IPv6路径已损坏，happy-eyeballs会回退到IPv4
+        status = "ok" if self.family_report["v6"]["reachable"] else "v6_unreachable"
+        self.set_status("dual_stack", status, ipv6=ipv6, v4_ms=result["v4_ms"], v6_ms=result["v6_ms"],
+                        latency_ms=result["v6_ms"])
+        return result
+
+    async def throughput_test(self):
+        """下载测速，测速过程中通过update_callback推送实时速率"""
+        def fmt(summary):
+            return self.lang_manager.get_text("network_test.throughput").format(
+                rate=f"{summary['current_bps'] * 8 / 1_000_000:.2f}",
+                peak=f"{summary['peak_bps'] * 8 / 1_000_000:.2f}",
+                size=f"{summary['bytes'] / 1024 / 1024:.1f}"
+            )
+
+        async def on_progress(summary):
+            if self.update_callback:
+                await self.update_callback("throughput", fmt(summary))
+
+        try:
+            report = await measure_throughput(
+                self.session,
+                self.endpoints['throughput'],
+                streams=self.throughput_streams,
+                max_bytes=100 * 1024 * 1024,
+                max_seconds=10,
+                on_progress=on_progress,
+                headers={'User-Agent': self.browser_headers['User-Agent']}
+            )
+            self.throughput_report = report
+            self.set_status("throughput", "ok", bps=report["average_bps"])
+            # 最终结果使用整个测速期间的平均速率
+            return fmt(dict(report, current_bps=report["average_bps"]))
+        except Exception:
+            self.set_status("throughput", "error")
+            return self.lang_manager.get_text("errors.throughput_error")
+
+    async def run_all_checks(self, update_callback=None, deadline=None):
+        """运行全部检测；deadline为time.perf_counter()时间点，到达后未完成的检测报告超时"""
+        self.tracer = Tracer()
+        token = current_tracer.set(self.tracer)
+        try:
+            return await self._run_all_checks(update_callback, deadline)
+        finally:
+            current_tracer.reset(token)
+            # 双栈检测被跳过或超时时，取消仍在进行的IPv6发现；运行被中断时取消后台的网络探测
+            tasks = [self._ipv6_task, self.network_probe and self.network_probe["task"]]
+            self._ipv6_task = None
+            for task in tasks:
+                if task:
+                    task.cancel()
+            await asyncio.gather(*(task for task in tasks if task), return_exceptions=True)
+
+    async def _run_all_checks(self, update_callback, deadline):
+        if update_callback:
+            callback = update_callback
+
+            async def update_callback(key, value):
+                with span(f"update {key}", "ui"):
+                    await callback(key, value)
+        self.update_callback = update_callback
+        # 首先只获取IP信息
+        try:
+            with span("ip_info", "check"):
+                if deadline is None:
+                    ip_info = await self.get_ip_info()
+                else:
+                    # IP信息是后续检测的前提，最多占用剩余时间的一半
+                    try:
+                        ip_info = await asyncio.wait_for(self.get_ip_info(), max(deadline - time.perf_counter(), 0) / 2)
+                    except asyncio.TimeoutError:
+                        ip_info = {"error": self.lang_manager.get_text("errors.timeout")}
+            if update_callback:
+                await update_callback("ip_info", ip_info)
+            
+            # 如果在受限制国家，不执行其他检查
+            if ip_info.get("restricted"):
+                if update_callback:
+                    country_code = ip_info["country_code"]
+                    country_info = self.restricted_countries[country_code]
+                    await update_callback("network_status", 
+                        f"{self.lang_manager.get_text('restricted_warning.prefix')}{country_info[self.lang_manager.current_lang]}{self.lang_manager.get_text('restricted_warning.suffix')}")
+                    await update_callback("google_region", self.lang_manager.get_text("main.network_status.test_terminated"))
+                    await update_callback("github_speed", self.lang_manager.get_text("main.network_status.test_terminated"))
+                return {"ip_info": ip_info}
+        except Exception as e:
+            print(f"Error getting IP info: {e}")
+            if update_callback:
+                await update_callback("ip_info", {"error": str(e)})
+            return {}
+
+        # 如果不在受限制国家，按依赖关系调度其余检测
+        results = {"ip_info": ip_info}
+
+        async def on_result(key, value, error):
+            if error is None:
+                results[key] = value
+            elif isinstance(error, asyncio.TimeoutError):
+                results[key] = self.lang_manager.get_text("errors.check_timeout")
+            else:
+                results[key] = f"错误: {str(error)}"
+            if update_callback:
+                await update_callback(key, results[key])
+
+        self.last_schedule = DagScheduler(self.registry, max_concurrency=self.max_concurrency,
+                                          group_limits=self.group_limits)
+        try:
+            await self.last_schedule.run(self, on_result, deadline=deadline)
+        except Exception as e:
+            print(f"Error in run_all_checks: {e}")
+        await self.settle_network_probe(results, update_callback, deadline)
+
+        return results
+
+
+def _network_is_free(worker, results):
+    return worker.network_free
+
+
+def _throughput_enabled(worker, results):
+    return worker.throughput
+
+
+def _direct_connection(worker, results):
+    return worker.direct
+
+
+# 默认检测项：新增检测只需在此注册
+DEFAULT_CHECKS = CheckRegistry()
+DEFAULT_CHECKS.add(Check("network_status", AsyncWorker.check_network_freedom, timeout=15, priority=10, group="probe"))
+DEFAULT_CHECKS.add(Check("google_region", AsyncWorker.extract_prefdomain_url, timeout=10))
+DEFAULT_CHECKS.add(Check("github_speed", AsyncWorker.raw_githubusercontent_speed_test, timeout=20))
+DEFAULT_CHECKS.add(Check("academic_name", AsyncWorker.get_auto_login_name, timeout=10))
+DEFAULT_CHECKS.add(Check("netflix", AsyncWorker.check_netflix, depends_on=["network_status"],
+                         timeout=35, group="streaming", condition=_network_is_free))
+DEFAULT_CHECKS.add(Check("youtube", AsyncWorker.check_youtube_premium, depends_on=["network_status"],
+                         timeout=15, group="streaming", condition=_network_is_free))
+DEFAULT_CHECKS.add(Check("dual_stack", AsyncWorker.compare_address_families, timeout=20, priority=-5,
+                         group="bandwidth", condition=_direct_connection))
+# 下载测速会占满带宽，等延迟测试完成后再开始
+DEFAULT_CHECKS.add(Check("throughput", AsyncWorker.throughput_test, depends_on=["github_speed"],
+                         timeout=20, priority=-10, group="bandwidth", condition=_throughput_enabled))
+
+# 各并发分组的上限：双栈延迟对比与占满带宽的下载测速不能同时进行，否则延迟结果失真；
+# 未列出的分组（probe、streaming）只用于追踪中的分组标记，不限制并发
+DEFAULT_GROUP_LIMITS = {"bandwidth": 1}